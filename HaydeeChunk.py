@@ -0,0 +1,185 @@
+# <pep8 compliant>
+
+import codecs
+import mmap
+import struct
+from enum import Enum
+
+import numpy as np
+
+from .HaydeeUtils import decodeText
+
+
+# Global enum for asset type
+class Signature(Enum):
+    HD_CHUNK = 0
+    HD_DATA_TXT = 1
+    HD_DATA_TXT_BOM = 2
+    HD_MOTION = 3
+
+
+HD_CHUNK = b'\x48\x44\x5F\x43\x48\x55\x4E\x4B'
+HD_DATA_TXT = b'\x48\x44\x5F\x44\x41\x54\x41\x5F\x54\x58\x54'
+HD_DATA_TXT_BOM = b'\xFF\xFE\x48\x00\x44\x00\x5F\x00\x44\x00\x41\x00\x54\x00\x41\x00\x5F\x00\x54\x00\x58\x00\x54\x00'
+HD_MOTION = b'\x48\x44\x5F\x4D\x4F\x54\x49\x4F\x4E\x00'
+
+# HD_CHUNK layout: 20 bytes signature, entry count, serial size,
+# then a table of 48 bytes entries (name, size, offset, numSubs, subs)
+CHUNK_HEADER_SIZE = 28
+CHUNK_ENTRY_SIZE = 48
+unpack_entry = struct.Struct('<32siiii').unpack_from
+pack_entry = struct.Struct('<32siiii').pack_into
+
+
+def sig_check(mview):
+    result = None
+    if (mview[0:8] == (HD_CHUNK)):
+        result = Signature.HD_CHUNK
+    elif (mview[0:11] == (HD_DATA_TXT)):
+        result = Signature.HD_DATA_TXT
+    elif (mview[0:24] == (HD_DATA_TXT_BOM)):
+        result = Signature.HD_DATA_TXT_BOM
+    elif (mview[0:10] == (HD_MOTION)):
+        result = Signature.HD_MOTION
+    return result
+
+
+def readStrW(data):
+    # Read prefixed UTF16/wide string
+    length = int.from_bytes(data[0:4], byteorder='little') * 2
+    return codecs.decode(data[4:4 + length], "utf-16-le")
+
+
+class HdChunkFile:
+    """Memory mapped Haydee binary file.
+
+    The HD_CHUNK entry table is indexed once on open. Properties are
+    handed out as memoryview slices of the mapping, so nothing is copied
+    until a typed accessor decodes it.
+    """
+
+    def __init__(self, filepath):
+        self._file = open(filepath, 'rb')
+        self._mmap = None
+        if (self._file.seek(0, 2) > 0):
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self._mmap)
+        else:
+            self.view = memoryview(b'')
+        self.signature = sig_check(self.view)
+        self.asset_type = None
+        self.entries = {}
+        self.data_offset = 0
+        if (self.signature == Signature.HD_CHUNK and len(self.view) >= CHUNK_HEADER_SIZE):
+            self._read_table()
+
+    def _read_table(self):
+        count = int.from_bytes(self.view[20:24], byteorder='little')
+        self.data_offset = CHUNK_HEADER_SIZE + (count * CHUNK_ENTRY_SIZE)
+        for n in range(count):
+            (name, size, offset, numSubs, subs) = \
+                unpack_entry(self.view, CHUNK_HEADER_SIZE + (n * CHUNK_ENTRY_SIZE))
+            name = decodeText(name)
+            if n == 0:
+                # First entry is the asset type
+                self.asset_type = name
+                continue
+            self.entries[name] = (size, offset, numSubs, subs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def close(self):
+        try:
+            self.view.release()
+            if self._mmap:
+                self._mmap.close()
+        except BufferError:
+            # Arrays handed out still use the mapping,
+            # it is released when they are garbage collected
+            pass
+        self._file.close()
+
+    @property
+    def data(self):
+        """Everything after the entry table."""
+        return self.view[self.data_offset:]
+
+    def get(self, name):
+        """Payload of a property (memoryview) or None."""
+        entry = self.entries.get(name)
+        if not entry or entry[0] <= 0:
+            return None
+        start = self.data_offset + entry[1]
+        return self.view[start:start + entry[0]]
+
+    def read_int(self, name, default=None):
+        value = self.get(name)
+        return default if value is None else int.from_bytes(value[0:4], byteorder='little', signed=True)
+
+    def read_float(self, name, default=None):
+        value = self.get(name)
+        return default if value is None else struct.unpack_from('<f', value)[0]
+
+    def read_str(self, name, default=None):
+        value = self.get(name)
+        return default if value is None else decodeText(bytes(value))
+
+    def read_wstr(self, name, default=None):
+        value = self.get(name)
+        return default if value is None else readStrW(value)
+
+    def read_struct(self, name, fmt, default=None):
+        value = self.get(name)
+        return default if value is None else struct.unpack_from(fmt, value)
+
+    def read_records(self, name, fmt, count):
+        """Unpack count equally sized records of a property."""
+        value = self.get(name)
+        if value is None or count <= 0:
+            return []
+        stride = len(value) // count
+        unpack = struct.Struct(fmt).unpack_from
+        return [unpack(value, stride * n) for n in range(count)]
+
+    def read_array(self, name, dtype, count=-1):
+        """Zero copy NumPy view of a property."""
+        value = self.get(name)
+        if value is None:
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(value, dtype=dtype, count=count)
+
+
+def chunk_bytes(asset_type, properties):
+    """Contents of an HD_CHUNK file.
+
+    properties is a sequence of (name, payload) pairs, payloads are
+    bytes or NumPy arrays and are stored one after the other. The first
+    entry holds the asset type and the size of all the data.
+    """
+    payloads = [(name, value.tobytes() if isinstance(value, np.ndarray) else bytes(value))
+                for (name, value) in properties]
+    count = len(payloads) + 1
+    dataOffset = CHUNK_HEADER_SIZE + (count * CHUNK_ENTRY_SIZE)
+    dataSize = sum(len(value) for (name, value) in payloads)
+    out = bytearray(dataOffset + dataSize)
+    struct.pack_into('<20sii', out, 0, HD_CHUNK, count, dataSize)
+    pack_entry(out, CHUNK_HEADER_SIZE, asset_type.encode('latin'), dataSize, 0, len(payloads), 0)
+    offset = 0
+    for n, (name, value) in enumerate(payloads, 1):
+        pack_entry(out, CHUNK_HEADER_SIZE + (n * CHUNK_ENTRY_SIZE), name.encode('latin'), len(value), offset, 0, 0)
+        out[dataOffset + offset:dataOffset + offset + len(value)] = value
+        offset += len(value)
+    return out
+
+
+def write_chunk_file(filepath, asset_type, properties):
+    """Write an HD_CHUNK file in a single write."""
+    with open(filepath, 'wb') as a_file:
+        a_file.write(chunk_bytes(asset_type, properties))
@@ -3,8 +3,17 @@
 import bpy
 import os
 import re
-from .HaydeeUtils import d, find_armature, file_format_prop
+import shutil
+import struct
+import tempfile
+import numpy as np
+from .HaydeeUtils import d_array, find_armature, file_format_prop
 from .HaydeeUtils import boneRenameHaydee, materials_list, stripName, NAME_LIMIT
+from .HaydeeSkeleton import parent_indices
+from .HaydeeMotion import euler_matrices, axis_angle_quaternions, basis_matrices, armature_matrices, dmot_keys
+from .HaydeeMotion import motion_keys
+from .HaydeeChunk import write_chunk_file
+from .HaydeeMesh import MESH_VERT_DTYPE, to_haydee, split_vertices, vertex_tangents
 from . import HaydeeMenuIcon
 from bpy_extras.wm_utils.progress_report import (
     ProgressReport,
@@ -31,9 +40,7 @@ def write_dskel(operator, context, filepath):
 
     bones = armature.data.bones
 
-    f = open(filepath, 'w', encoding='utf-8')
-    f.write("HD_DATA_TXT 300\n\n")
-    f.write("skeleton %d\n{\n" % len(bones))
+    records = []
     r = Quaternion([0, 0, 1], -pi / 2)
     for bone in bones:
         head = bone.head_local.xzy
@@ -44,21 +51,33 @@ def write_dskel(operator, context, filepath):
         bone_name = boneRenameHaydee(bone.name)
 
         bone_side = bone.length / 4
-        f.write("\tbone %s\n\t{\n" % bone_name)
-        f.write("\t\twidth %s;\n" % d(bone_side))
-        f.write("\t\theight %s;\n" % d(bone_side))
-        f.write("\t\tlength %s;\n" % d(bone.length))
-
+        parent_name = None
         if bone.parent:
             parent_name = boneRenameHaydee(bone.parent.name)
-            f.write("\t\tparent %s;\n" % parent_name)
             head = bone.head_local
             head = Vector((head.x, head.z, head.y))
 
         head = Vector((-head.x, head.y, -head.z))
         q = Quaternion([q.x, q.z, q.y, q.w])
-        f.write("\t\torigin %s %s %s;\n" % (d(head.x), d(head.y), d(head.z)))
-        f.write("\t\taxis %s %s %s %s;\n" % (d(q.w), d(q.x), d(q.y), d(q.z)))
+        records.append((bone_name, parent_name, (bone_side, bone_side, bone.length,
+                                                 head.x, head.y, head.z, q.w, q.x, q.y, q.z)))
+
+    # all numbers formatted at once, 10 per bone
+    values = d_array([numbers for (bone_name, parent_name, numbers) in records])
+
+    f = open(filepath, 'w', encoding='utf-8')
+    f.write("HD_DATA_TXT 300\n\n")
+    f.write("skeleton %d\n{\n" % len(bones))
+    for n, (bone_name, parent_name, numbers) in enumerate(records):
+        (width, height, length, ox, oy, oz, aw, ax, ay, az) = values[n * 10:(n + 1) * 10]
+        f.write("\tbone %s\n\t{\n" % bone_name)
+        f.write("\t\twidth %s;\n" % width)
+        f.write("\t\theight %s;\n" % height)
+        f.write("\t\tlength %s;\n" % length)
+        if parent_name:
+            f.write("\t\tparent %s;\n" % parent_name)
+        f.write("\t\torigin %s %s %s;\n" % (ox, oy, oz))
+        f.write("\t\taxis %s %s %s %s;\n" % (aw, ax, ay, az))
         f.write("\t}\n")
 
     f.write("}\n")
@@ -96,9 +115,7 @@ def write_dpose(operator, context, filepath):
 
     bones = armature.pose.bones
 
-    f = open(filepath, 'w', encoding='utf-8')
-    f.write("HD_DATA_TXT 300\n\n")
-    f.write("pose\n{\n\tnumTransforms %d;\n" % len(bones))
+    numbers = []
     r = Quaternion([0, 0, 1], pi / 2)
     for bone in bones:
         head = bone.head.xzy
@@ -110,10 +127,17 @@ def write_dpose(operator, context, filepath):
             q = (bone.parent.matrix.to_3x3().inverted() @ bone.matrix.to_3x3()).to_quaternion()
             q = Quaternion([q.z, -q.y, q.x, -q.w])
 
+        numbers.append((-head.x, head.y, -head.z, q.x, -q.w, q.y, q.z))
+
+    # all numbers formatted at once, 7 per bone
+    values = d_array(numbers)
+
+    f = open(filepath, 'w', encoding='utf-8')
+    f.write("HD_DATA_TXT 300\n\n")
+    f.write("pose\n{\n\tnumTransforms %d;\n" % len(bones))
+    for n, bone in enumerate(bones):
         f.write("\ttransform %s %s %s %s %s %s %s %s;\n" % (
-            boneRenameHaydee(bone.name),
-            d(-head.x), d(head.y), d(-head.z),
-            d(q.x), d(-q.w), d(q.y), d(q.z)))
+            (boneRenameHaydee(bone.name),) + tuple(values[n * 7:(n + 1) * 7])))
 
     f.write("}\n")
     f.close()
@@ -143,58 +167,159 @@ class ExportHaydeeDPose(Operator, ExportHelper):
 #  .dmot exporter
 # --------------------------------------------------------------------------------
 
-def write_dmot(operator, context, filepath):
-    armature = find_armature(operator, context)
-    if armature is None:
-        return {'FINISHED'}
-
+# Frames turned into matrices at a time
+FRAME_BLOCK = 1024
+# Keys formatted at a time
+KEY_BLOCK = 4096
+KEY_LINE = "\t\tkey %s %s %s %s %s %s %s;\n"
+# Size of the output file buffer
+WRITE_BUFFER = 1 << 20
+
+
+def sample_fcurve(fcurve, frames):
+    # Keys on exactly the exported frames are read in one go,
+    # anything else is evaluated frame by frame
+    count = len(fcurve.keyframe_points)
+    if count == len(frames) and not fcurve.modifiers:
+        co = np.empty(count * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get("co", co)
+        co = co.reshape(-1, 2)
+        if np.array_equal(co[:, 0], frames):
+            return co[:, 1]
+    return np.array([fcurve.evaluate(frame) for frame in frames])
+
+
+def sample_channel(action, bone, prop, frames):
+    # (frames, size) values of a pose bone property,
+    # unanimated components keep their current value
+    current = np.array(getattr(bone, prop), dtype=np.float64)
+    values = np.tile(current, (len(frames), 1))
+    if action:
+        data_path = bone.path_from_id(prop)
+        for index in range(len(current)):
+            fcurve = action.fcurves.find(data_path, index=index)
+            if fcurve and not fcurve.mute:
+                values[:, index] = sample_fcurve(fcurve, frames)
+    return values
+
+
+def pose_evaluation_reasons(armature):
+    # What makes the pose differ from its F-curves
+    reasons = []
+    anim = armature.animation_data
+    if anim and any(driver.data_path.startswith('pose.bones') for driver in anim.drivers):
+        reasons.append("drivers")
+    if anim and anim.use_nla and any(not track.mute for track in anim.nla_tracks):
+        reasons.append("NLA tracks")
+    if any(not constraint.mute for bone in armature.pose.bones for constraint in bone.constraints):
+        reasons.append("constraints")
+    if any(not bone.use_inherit_rotation or not bone.use_local_location
+           or getattr(bone, 'inherit_scale', 'FULL') != 'FULL' for bone in armature.data.bones):
+        reasons.append("bone inheritance settings")
+    return reasons
+
+
+def pose_parents(bones):
+    # Parent index of every pose bone, -1 for roots
+    names = [bone.name for bone in bones]
+    return parent_indices(names, [bone.parent.name if bone.parent else None for bone in bones])
+
+
+def sample_keys(armature, frames, pose_keys=dmot_keys):
+    # (bones, frames, 7) keys from the action F-curves,
+    # no scene evaluation. Channels are sampled for all frames,
+    # matrices are only built for FRAME_BLOCK frames at a time.
+    # pose_keys turns pose matrices into keys of the file format
+    anim = armature.animation_data
+    action = anim.action if anim else None
     bones = armature.pose.bones
-    keyframeCount = bpy.context.scene.frame_end - bpy.context.scene.frame_start + 1
-    previousFrame = bpy.context.scene.frame_current
-    wm = bpy.context.window_manager
-
-    lines = {}
+    channels = []
     for bone in bones:
-        name = boneRenameHaydee(bone.name)
-        lines[name] = []
-
-    r = Quaternion([0, 0, 1], pi / 2)
-    wm.progress_begin(0, keyframeCount)
-    for frame in range(keyframeCount):
-        wm.progress_update(frame)
-        context.scene.frame_set(frame + bpy.context.scene.frame_start)
-        for bone in bones:
-
-            head = bone.head.xzy
-            q = bone.matrix.to_quaternion()
-            q = -(q @ r)
-            if bone.parent:
-                head = bone.parent.matrix.inverted().to_quaternion() @ (bone.head - bone.parent.head)
-                head = Vector((-head.y, head.z, head.x))
-                q = (bone.parent.matrix.to_3x3().inverted() @ bone.matrix.to_3x3()).to_quaternion()
-                q = Quaternion([-q.z, -q.y, q.x, -q.w])
-
-            name = boneRenameHaydee(bone.name)
-            lines[name].append("\t\tkey %s %s %s %s %s %s %s;\n" % (
-                d(-head.x), d(head.y), d(-head.z),
-                d(q.x), d(q.w), d(q.y), d(q.z)))
+        locs = sample_channel(action, bone, 'location', frames)
+        if bone.bone.use_connect:
+            # connected bones ignore their location
+            locs[:] = 0
+        scales = sample_channel(action, bone, 'scale', frames)
+        if bone.rotation_mode == 'QUATERNION':
+            rots = sample_channel(action, bone, 'rotation_quaternion', frames)
+        elif bone.rotation_mode == 'AXIS_ANGLE':
+            rots = axis_angle_quaternions(sample_channel(action, bone, 'rotation_axis_angle', frames))
+        else:
+            rots = euler_matrices(sample_channel(action, bone, 'rotation_euler', frames), bone.rotation_mode)
+        channels.append((locs, rots, scales))
+    rest = np.array([bone.bone.matrix_local for bone in bones])
+    parents = pose_parents(bones)
+
+    keys = np.empty((len(bones), len(frames), 7), dtype=np.float32)
+    for start in range(0, len(frames), FRAME_BLOCK):
+        block = slice(start, start + FRAME_BLOCK)
+        basis = np.array([basis_matrices(locs[block], rots[block], scales[block])
+                          for (locs, rots, scales) in channels])
+        keys[:, block] = pose_keys(armature_matrices(parents, rest, basis), parents)
+    return keys
+
+
+def evaluate_keys(context, armature, frames, pose_keys=dmot_keys):
+    # (bones, frames, 7) keys,
+    # the scene is evaluated on every frame
+    bones = armature.pose.bones
+    parents = pose_parents(bones)
+    previousFrame = context.scene.frame_current
+    wm = context.window_manager
+    keys = np.empty((len(bones), len(frames), 7), dtype=np.float32)
+    poseMats = np.empty((len(bones), 1, 4, 4))
+    wm.progress_begin(0, len(frames))
+    for idx, frame in enumerate(frames):
+        wm.progress_update(idx)
+        context.scene.frame_set(frame)
+        poseMats[:, 0] = [bone.matrix for bone in bones]
+        keys[:, idx] = pose_keys(poseMats, parents)[:, 0]
     wm.progress_end()
-
     context.scene.frame_set(previousFrame)
+    return keys
 
-    f = open(filepath, 'w', encoding='utf-8')
-    f.write("HD_DATA_TXT 300\n\n")
-    f.write("motion\n{\n")
-    f.write("\tnumTracks %d;\n" % len(bones))
-    f.write("\tnumFrames %d;\n" % keyframeCount)
-    f.write("\tframeRate %g;\n" % context.scene.render.fps)
-    for bone in bones:
-        name = boneRenameHaydee(bone.name)
+
+def write_tracks(f, names, keys):
+    # Stream the track blocks, KEY_BLOCK keys are formatted at a time
+    for name, track in zip(names, keys):
         f.write("\ttrack %s\n\t{\n" % name)
-        f.write("".join(lines[name]))
+        for start in range(0, len(track), KEY_BLOCK):
+            block = track[start:start + KEY_BLOCK]
+            f.write((KEY_LINE * len(block)) % tuple(d_array(block)))
         f.write("\t}\n")
-    f.write("}\n")
-    f.close()
+
+
+def armature_keys(operator, context, armature, frames, sample_fcurves, pose_keys=dmot_keys):
+    # Keys from the F-curves when they give the pose,
+    # from the evaluated scene otherwise
+    if sample_fcurves:
+        reasons = pose_evaluation_reasons(armature)
+        if reasons:
+            operator.report({'WARNING'}, "Pose uses %s, evaluating the scene on every frame" % ", ".join(reasons))
+            sample_fcurves = False
+    if sample_fcurves:
+        return sample_keys(armature, frames, pose_keys)
+    return evaluate_keys(context, armature, frames, pose_keys)
+
+
+def write_dmot(operator, context, filepath, sample_fcurves=True):
+    armature = find_armature(operator, context)
+    if armature is None:
+        return {'FINISHED'}
+
+    bones = armature.pose.bones
+    frames = np.arange(context.scene.frame_start, context.scene.frame_end + 1)
+    keyframeCount = len(frames)
+    keys = armature_keys(operator, context, armature, frames, sample_fcurves)
+
+    with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        f.write("HD_DATA_TXT 300\n\n")
+        f.write("motion\n{\n")
+        f.write("\tnumTracks %d;\n" % len(bones))
+        f.write("\tnumFrames %d;\n" % keyframeCount)
+        f.write("\tframeRate %g;\n" % context.scene.render.fps)
+        write_tracks(f, [boneRenameHaydee(bone.name) for bone in bones], keys)
+        f.write("}\n")
     return {'FINISHED'}
 
 
@@ -209,21 +334,116 @@ class ExportHaydeeDMotion(Operator, ExportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
 
+    sample_fcurves: BoolProperty(
+        name="Sample F-Curves",
+        description="Read the pose from the action F-curves instead of evaluating the scene on every frame "
+                    "(drivers, constraints and NLA tracks fall back to scene evaluation)",
+        default=True,
+    )
+
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        return write_dmot(self, context, self.filepath)
+        return write_dmot(self, context, self.filepath, self.sample_fcurves)
+
+
+# --------------------------------------------------------------------------------
+#  .motion exporter
+# --------------------------------------------------------------------------------
+
+# Experimental, the layout follows what read_motion reads and is not
+# checked against game files. The entry names are the ones of the
+# original importer property map, keys are (x, y, z, qx, qz, qy, qw)
+# and tracks (name, firstKey) as read_motion unpacks them. The unit
+# of duration (written in milliseconds), the events (none) and the
+# values of the asset type entry are not confirmed.
+
+def write_motion(operator, context, filepath, sample_fcurves=True):
+    armature = find_armature(operator, context)
+    if armature is None:
+        return {'FINISHED'}
+
+    bones = armature.pose.bones
+    frames = np.arange(context.scene.frame_start, context.scene.frame_end + 1)
+    keys = armature_keys(operator, context, armature, frames, sample_fcurves, motion_keys)
+
+    # Tracks are numFrames consecutive keys starting at firstKey
+    tracks = np.zeros(len(bones), dtype=[('name', 'S32'), ('firstKey', '<u4')])
+    tracks['name'] = [boneRenameHaydee(bone.name).encode('latin', 'replace')[:32] for bone in bones]
+    tracks['firstKey'] = np.arange(len(bones)) * len(frames)
+    # Duration in milliseconds
+    duration = int(round(len(frames) * 1000 / context.scene.render.fps))
+
+    write_chunk_file(filepath, 'motion', [
+        ('numFrames', struct.pack('<i', len(frames))),
+        ('duration', struct.pack('<i', duration)),
+        ('numKeys', struct.pack('<i', keys.shape[0] * keys.shape[1])),
+        ('numTracks', struct.pack('<i', len(bones))),
+        ('numEvents', struct.pack('<i', 0)),
+        ('keys', keys.astype('<f4')),
+        ('tracks', tracks),
+        ('events', b''),
+    ])
+    return {'FINISHED'}
+
+
+class ExportHaydeeMotion(Operator, ExportHelper):
+    bl_idname = "haydee_exporter.motion"
+    bl_label = "Export Haydee Motion (.motion, experimental)"
+    bl_description = "Export a Haydee Motion, the binary layout is not checked against game files"
+    bl_options = {'REGISTER'}
+    filename_ext = ".motion"
+    filter_glob: StringProperty(
+        default="*.motion",
+        options={'HIDDEN'},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+
+    sample_fcurves: BoolProperty(
+        name="Sample F-Curves",
+        description="Read the pose from the action F-curves instead of evaluating the scene on every frame "
+                    "(drivers, constraints and NLA tracks fall back to scene evaluation)",
+        default=True,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        return write_motion(self, context, self.filepath, self.sample_fcurves)
 
 
 # --------------------------------------------------------------------------------
 #  .dmesh exporter
 # --------------------------------------------------------------------------------
 
+# Group names may not start with a digit
+GROUP_NAME_DIGIT = re.compile('^[0-9]')
+# Face record formats by corner count
+FACE_TEMPLATES = {}
+# Characters of a section kept in memory before it spills to disk
+SECTION_SPOOL = 1 << 20
+
+
 def write_dmesh(operator, context, filepath, export_skeleton,
                 apply_modifiers, selected_only, separate_files,
                 ignore_hidden, SELECTED_MATERIAL, file_format):
+    # Sections are closed however the export ends
+    sections = DMeshSections()
+    try:
+        return export_dmesh(operator, context, filepath, sections, export_skeleton,
+                            apply_modifiers, selected_only, separate_files,
+                            ignore_hidden, SELECTED_MATERIAL, file_format)
+    finally:
+        sections.close()
+
+
+def export_dmesh(operator, context, filepath, sections, export_skeleton,
+                 apply_modifiers, selected_only, separate_files,
+                 ignore_hidden, SELECTED_MATERIAL, file_format):
     print("Exporting mesh, material: %s" % SELECTED_MATERIAL)
 
     mesh_count = 0
@@ -244,10 +464,9 @@ def write_dmesh(operator, context, filepath, export_skeleton,
     else:
         list = context.scene.objects
 
-    (vertex_output, uvs_output, groups_output, groups_count,
-        joints_output, weights_output, weights_count, group_count,
-        base_vertex_index, base_uv_index, armature, unique_uvs_pos,
-        uvs_dict) = reset_variables()
+    (groups_count, joints_output, weights_count, group_count,
+        base_vertex_index, base_uv_index, armature,
+        unique_uvs_pos) = reset_variables()
     group_name = None
 
     for ob in sorted([x for x in list if x.type == 'MESH'], key=lambda ob: ob.name):
@@ -257,10 +476,10 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                 continue
 
             if separate_files:
-                (vertex_output, uvs_output, groups_output, groups_count,
-                 joints_output, weights_output, weights_count, group_count,
-                 base_vertex_index, base_uv_index, armature, unique_uvs_pos,
-                 uvs_dict) = reset_variables()
+                sections.close()
+                (groups_count, joints_output, weights_count, group_count,
+                 base_vertex_index, base_uv_index, armature,
+                 unique_uvs_pos) = reset_variables()
 
             settings = 'PREVIEW'
             # XXX TO MESH
@@ -275,10 +494,15 @@ def write_dmesh(operator, context, filepath, export_skeleton,
             material_index = -1
             if len(mesh.uv_layers) >= 1:
                 uvs_data = mesh.uv_layers[0].data
+                uv_array = np.empty(len(uvs_data) * 2, dtype=np.float32)
+                uvs_data.foreach_get("uv", uv_array)
+                uv_coords = list(zip(uv_array[0::2].tolist(), uv_array[1::2].tolist()))
             else:
                 uvs_data = None
 
             first_uv_index = base_uv_index
+            # uv of every exported loop of this object
+            uvs_dict = []
             first_vertex_index = base_vertex_index
             vertex_map = {}
             new_mesh_uvs = []
@@ -286,15 +510,8 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                 for n in range(len(vertices)):
                     vertex_map[n] = base_vertex_index + n
                 if uvs_data is not None:
-                    for n, uv in enumerate(uvs_data):
-                        uv_pos = uv.uv
-                        if uv_pos in unique_uvs_pos:
-                            idx = unique_uvs_pos.index(uv_pos)
-                        else:
-                            idx = len(unique_uvs_pos)
-                            unique_uvs_pos.append(uv_pos)
-                            new_mesh_uvs.append(uv_pos)
-                        uvs_dict.append(idx)
+                    for uv_pos in uv_coords:
+                        uvs_dict.append(uv_index(uv_pos, unique_uvs_pos, new_mesh_uvs))
                     base_uv_index += len(uvs_data)
                 base_vertex_index += len(vertices)
             else:
@@ -309,14 +526,7 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                     if polygon.material_index == material_index:
                         if uvs_data is not None:
                             for uvIdx in polygon.loop_indices:
-                                uv_pos = uvs_data[uvIdx].uv
-                                if uv_pos in unique_uvs_pos:
-                                    idx = unique_uvs_pos.index(uv_pos)
-                                else:
-                                    idx = len(unique_uvs_pos)
-                                    unique_uvs_pos.append(uv_pos)
-                                    new_mesh_uvs.append(uv_pos)
-                                uvs_dict.append(idx)
+                                uvs_dict.append(uv_index(uv_coords[uvIdx], unique_uvs_pos, new_mesh_uvs))
                                 base_uv_index += 1
                         for vertex in polygon.vertices:
                             if not (vertex in vertex_map):
@@ -335,21 +545,23 @@ def write_dmesh(operator, context, filepath, export_skeleton,
             vertex_indexes = [0] * vertex_count
             for key, value in vertex_map.items():
                 vertex_indexes[value - first_vertex_index] = key
-            for index in vertex_indexes:
-                v = vertices[index]
-                co = mat @ v.co
-                vertex_output.append("\t\tvert %s %s %s;\n" % (d(-co.x), d(co.z), d(-co.y)))
+            positions = np.empty(len(vertices) * 3, dtype=np.float32)
+            vertices.foreach_get("co", positions)
+            world = np.array(mat)
+            coords = (positions.reshape(-1, 3)[vertex_indexes] @ world[:3, :3].T + world[:3, 3]).astype(np.float32)
+            coords = coords[:, (0, 2, 1)] * np.array((-1, 1, -1), dtype=np.float32)
+            sections.write('verts', ("\t\tvert %s %s %s;\n" * len(coords)) % tuple(d_array(coords)))
 
             # Export UV map
             uv_count = base_uv_index - first_uv_index
             print("Exporting %d uvs" % uv_count)
             uv_indexes = [-1] * uv_count
-            if len(mesh.uv_layers) >= 1:
-                for uv in new_mesh_uvs:
-                    uv_coord = Vector(uv)
-                    if (file_format == 'H2'):
-                        uv_coord = Vector((uv_coord.x, 1-uv_coord.y))
-                    uvs_output.append("\t\tuv %s %s;\n" % (d(uv_coord.x), d(uv_coord.y)))
+            if len(mesh.uv_layers) >= 1 and new_mesh_uvs:
+                uv_values = np.array(new_mesh_uvs, dtype=np.float64)
+                if (file_format == 'H2'):
+                    # flipped in double precision, stored as float like a Vector
+                    uv_values[:, 1] = (1 - uv_values[:, 1]).astype(np.float32)
+                sections.write('uvs', ("\t\tuv %s %s;\n" * len(uv_values)) % tuple(d_array(uv_values)))
 
             EXPORT_SMOOTH_GROUPS = False
             EXPORT_SMOOTH_GROUPS_BITFLAGS = True
@@ -361,111 +573,63 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                 smooth_groups, smooth_groups_tot = (), 0
 
             # Export faces (by material)
-            current_material_index = -1
+            # polygons are fetched once and bucketed by material with a stable sort
+            poly_count = len(polygons)
+            material_indices = np.empty(poly_count, dtype=np.int32)
+            polygons.foreach_get("material_index", material_indices)
+            loop_starts = np.empty(poly_count, dtype=np.int64)
+            polygons.foreach_get("loop_start", loop_starts)
+            loop_totals = np.empty(poly_count, dtype=np.int64)
+            polygons.foreach_get("loop_total", loop_totals)
+            loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+            mesh.loops.foreach_get("vertex_index", loop_verts)
+            vert_index = np.full(len(vertices), -1, dtype=np.int64)
+            vert_index[list(vertex_map.keys())] = list(vertex_map.values())
+            loop_uvs = None
+            if uvs_data is not None:
+                uv_indices = np.array(uvs_dict, dtype=np.int64)
+                if material_index == -1:
+                    loop_uvs = uv_indices
+                else:
+                    # only the loops of the exported polygons were welded
+                    loop_uvs = np.full(len(mesh.loops), -1, dtype=np.int64)
+                    polys = np.flatnonzero(material_indices == material_index)
+                    loop_uvs[face_loops(polys, loop_starts, loop_totals)[0]] = uv_indices
+            if smooth_groups_tot:
+                poly_smooth = np.asarray(smooth_groups, dtype=np.int64)
+            else:
+                poly_smooth = np.zeros(poly_count, dtype=np.int64)
 
-            if SELECTED_MATERIAL == '__ALL__':
-                current_material_index += 1
-                if material_index != -1 and material_index != current_material_index:
-                    continue
-                count = 0
-                for polygon in polygons:
-                    if polygon.material_index == current_material_index:
-                        count += 1
+            order = np.argsort(material_indices, kind='stable')
+            sorted_indices = material_indices[order]
+            if material_index != -1:
+                material_slots = [material_index]
+            else:
+                material_slots = range(max(len(materials), 1))
+
+            for current_material_index in material_slots:
+                faces = order[np.searchsorted(sorted_indices, current_material_index, 'left'):
+                              np.searchsorted(sorted_indices, current_material_index, 'right')]
+                count = len(faces)
                 if count == 0:
                     continue
 
                 if len(materials) > 1:
-                    group_name = ob.name + '_' + mat.name
+                    group_name = ob.name + '_' + getattr(materials[current_material_index], 'name', '')
                 else:
                     group_name = ob.name
-                regex = re.compile('^[0-9]')
-                if regex.match(group_name):
+                if GROUP_NAME_DIGIT.match(group_name):
                     group_name = 'x' + group_name
                 group_name = stripName(group_name)
                 group_name = group_name[:NAME_LIMIT]
-#                if not group_name:
-#                    operator.report({'ERROR'}, "Mesh " + ob.name + ", no group name")
-#                    continue
+
                 print(group_name, 'count', count)
-                if group_name in groups_output:
-                    group_output = groups_output[group_name]
-                else:
-                    group_output = []
+                if group_name not in groups_count:
                     groups_count[group_name] = 0
 
-                for polygon in polygons:
-                    if polygon.material_index == current_material_index:
-                        groups_count[group_name] += 1
-                        group_output.append("\t\t\tface\n\t\t\t{\n")
-                        group_output.append("\t\t\t\tcount %d;\n" % len(polygon.vertices))
-                        group_output.append("\t\t\t\tverts ")
-                        for v in tuple(polygon.vertices)[::-1]:
-                            group_output.append(" %d" % vertex_map[v])
-                        group_output.append(";\n")
-                        if uvs_data is not None:
-                            group_output.append("\t\t\t\tuvs ")
-                            for v in tuple(polygon.loop_indices)[::-1]:
-                                group_output.append(" %d" % uvs_dict[v + first_uv_index])
-                            group_output.append(";\n")
-                        if smooth_groups_tot:
-                            group_output.append("\t\t\t\tsmoothGroup %d;\n\t\t\t}\n" % smooth_groups[polygon.index])
-                        else:
-                            group_output.append("\t\t\t\tsmoothGroup %d;\n\t\t\t}\n" % 0)
-                groups_output[group_name] = group_output
-
-            else:
-
-                for mat in materials:
-                    current_material_index += 1
-                    if material_index != -1 and material_index != current_material_index:
-                        continue
-                    count = 0
-                    for polygon in polygons:
-                        if polygon.material_index == current_material_index:
-                            count += 1
-                    if count == 0:
-                        continue
-
-                    if len(materials) > 1:
-                        group_name = ob.name + '_' + mat.name
-                    else:
-                        group_name = ob.name
-                    regex = re.compile('^[0-9]')
-                    if regex.match(group_name):
-                        group_name = 'x' + group_name
-                    group_name = stripName(group_name)
-                    group_name = group_name[:NAME_LIMIT]
-
-#                    if not group_name:
-#                        operator.report({'ERROR'}, "Mesh " + ob.name + ", no group name")
-#                        continue
-
-                    print(group_name, 'count', count)
-                    if group_name in groups_output:
-                        group_output = groups_output[group_name]
-                    else:
-                        group_output = []
-                        groups_count[group_name] = 0
-
-                    for polygon in polygons:
-                        if polygon.material_index == current_material_index:
-                            groups_count[group_name] += 1
-                            group_output.append("\t\t\tface\n\t\t\t{\n")
-                            group_output.append("\t\t\t\tcount %d;\n" % len(polygon.vertices))
-                            group_output.append("\t\t\t\tverts ")
-                            for v in tuple(polygon.vertices)[::-1]:
-                                group_output.append(" %d" % vertex_map[v])
-                            group_output.append(";\n")
-                            if uvs_data is not None:
-                                group_output.append("\t\t\t\tuvs ")
-                                for v in tuple(polygon.loop_indices)[::-1]:
-                                    group_output.append(" %d" % uvs_dict[v + first_uv_index])
-                                group_output.append(";\n")
-                            if smooth_groups_tot:
-                                group_output.append("\t\t\t\tsmoothGroup %d;\n\t\t\t}\n" % smooth_groups[polygon.index])
-                            else:
-                                group_output.append("\t\t\t\tsmoothGroup %d;\n\t\t\t}\n" % 0)
-                    groups_output[group_name] = group_output
+                groups_count[group_name] += count
+                sections.write_group(group_name, face_records(faces, loop_starts, loop_totals,
+                                                              vert_index[loop_verts], loop_uvs, poly_smooth))
 
             # Export skeleton
             if export_skeleton:
@@ -480,6 +644,7 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                             mat = armature.matrix_world
 
                             joints_output.append("\tjoints %d\n\t{\n" % len(bones))
+                            joint_records = []
                             bone_indexes = {}
                             bone_index = 0
                             r = Quaternion([0, 0, 1], -pi / 2)
@@ -493,10 +658,9 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                                 bone_name = boneRenameHaydee(bone.name)
 
                                 # print("Bone %s quaternion: %s" % (bone.name, bone.matrix.to_quaternion() @ r))
-                                joints_output.append("\t\tjoint %s\n\t\t{\n" % bone_name)
+                                parent_name = None
                                 if bone.parent:
                                     parent_name = boneRenameHaydee(bone.parent.name)
-                                    joints_output.append("\t\t\tparent %s;\n" % parent_name)
                                     q = (bone.parent.matrix_local.to_3x3().inverted() @ bone.matrix_local.to_3x3()).to_quaternion()
                                     q = Quaternion([q.w, -q.y, q.x, q.z])
                                     print("%s head: %s parent head: %s" % (bone.name[:NAME_LIMIT], bone.head, bone.parent.head_local))
@@ -507,8 +671,17 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                                 head = Vector((head.x, head.z, head.y))
                                 q = Quaternion([-q.w, q.x, -q.z, q.y])
                                 q = Quaternion([q.x, q.y, q.z, q.w])
-                                joints_output.append("\t\t\torigin %s %s %s;\n" % (d(head.x), d(head.y), d(head.z)))
-                                joints_output.append("\t\t\taxis %s %s %s %s;\n" % (d(q.w), d(q.x), d(q.y), d(q.z)))
+                                joint_records.append((bone_name, parent_name,
+                                                      (head.x, head.y, head.z, q.w, q.x, q.y, q.z)))
+
+                            # all numbers formatted at once, 7 per joint
+                            values = d_array([numbers for (bone_name, parent_name, numbers) in joint_records])
+                            for n, (bone_name, parent_name, numbers) in enumerate(joint_records):
+                                joints_output.append("\t\tjoint %s\n\t\t{\n" % bone_name)
+                                if parent_name:
+                                    joints_output.append("\t\t\tparent %s;\n" % parent_name)
+                                joints_output.append("\t\t\torigin %s %s %s;\n" % tuple(values[n * 7:n * 7 + 3]))
+                                joints_output.append("\t\t\taxis %s %s %s %s;\n" % tuple(values[n * 7 + 3:(n + 1) * 7]))
                                 joints_output.append("\t\t}\n")
                             joints_output.append("\t}\n")
 
@@ -516,78 +689,172 @@ def write_dmesh(operator, context, filepath, export_skeleton,
                             operator.report({'ERROR'}, "Multiple armatures present, please select only one")
                             continue
 
-                        vertex_weights = {}
-                        vertex_groups = ob.vertex_groups
-                        invalid_weighting = False
-                        for v in mesh.vertices:
-                            for g in v.groups:
-                                group = vertex_groups[g.group]
-                                if not (group.name[:NAME_LIMIT] in bone_indexes):
-                                    continue
-                                bone = bone_indexes[group.name[:NAME_LIMIT]]
-                                if v.index in vertex_map:
-                                    if g.weight > 0:
-                                        i = vertex_map[v.index]
-                                        if not (i in vertex_weights):
-                                            vertex_weights[i] = []
-                                        vertex_weights[i].append((vertex_map[v.index], bone, g.weight))
-                        for i in sorted(vertex_weights.keys()):
-                            weight_list = vertex_weights[i]
-                            # sort bone names first?
-                            # weight_list = sorted(weight_list, key=lambda bw: bw[1], reverse=True)
-                            weight_list = sorted(weight_list, key=lambda bw: bw[2], reverse=True)
-                            # if len(weight_list) > 4:
-                            #    weight_list = weight_list[0:3]
-                            sum = 0
-                            for w in weight_list:
-                                sum += w[2]
-                            for w in weight_list:
-                                normalized_weight = w[2] / sum
-                                weights_output.append("\t\tweight %d %d %s;\n" % (w[0], w[1], d(normalized_weight)))
-                                weights_count += 1
+                        # (vertex, group, weight) of every influence in one pass,
+                        # the API has no bulk access to deform weights
+                        influences = [(v.index, g.group, g.weight) for v in vertices for g in v.groups]
+                        if not influences:
+                            continue
+                        (vert, group, weight) = np.array(influences).T
+                        # group names resolved to bone indices once per object
+                        group_bones = np.array([bone_indexes.get(g.name[:NAME_LIMIT], -1)
+                                                for g in ob.vertex_groups], dtype=np.int64)
+                        bone = group_bones[group.astype(np.int64)]
+                        vert = vert_index[vert.astype(np.int64)]
+                        used = (bone >= 0) & (vert >= 0) & (weight > 0)
+                        (vert, bone, weight) = (vert[used], bone[used], weight[used])
+                        # by vertex, then heaviest first (stable like sorted())
+                        order = np.lexsort((-weight, vert))
+                        (vert, bone, weight) = (vert[order], bone[order], weight[order])
+                        totals = np.bincount(vert, weights=weight)
+                        normalized = weight / totals[vert]
+                        sections.write('weights', ("\t\tweight %d %d %s;\n" * len(vert)) % tuple(
+                            value for record in zip(vert.tolist(), bone.tolist(), d_array(normalized))
+                            for value in record))
+                        weights_count += len(vert)
             # clean up
             ob_for_convert.to_mesh_clear()
 
         if separate_files:
-            to_file(separate_files, filepath, group_name, base_vertex_index, vertex_output,
-                    unique_uvs_pos, uvs_output, groups_output, groups_count,
-                    joints_output, weights_count, weights_output)
+            to_file(separate_files, filepath, group_name, base_vertex_index,
+                    unique_uvs_pos, groups_count, joints_output, weights_count, sections)
 
     if not separate_files:
         if base_vertex_index == 0 or not group_name:
             operator.report({'ERROR'}, "Nothing to export")
             return {'FINISHED'}
 
-        to_file(separate_files, filepath, group_name, base_vertex_index, vertex_output,
-                unique_uvs_pos, uvs_output, groups_output, groups_count,
-                joints_output, weights_count, weights_output)
+        to_file(separate_files, filepath, group_name, base_vertex_index,
+                unique_uvs_pos, groups_count, joints_output, weights_count, sections)
 
     return {'FINISHED'}
 
 
+def face_records(faces, loop_starts, loop_totals, loop_verts, loop_uvs, poly_smooth):
+    # Text of the face records of a group, all formatted at once.
+    # Corners are written in reverse order, loop_uvs is None without UVs
+    totals = loop_totals[faces]
+    template = "".join(face_template(n, loop_uvs is not None) for n in totals.tolist())
+    # per face: count, verts, uvs, smoothGroup
+    fields = 2 + totals * (1 if loop_uvs is None else 2)
+    starts = np.cumsum(fields) - fields
+    values = np.empty(int(fields.sum()), dtype=np.int64)
+    values[starts] = totals
+    values[starts + fields - 1] = poly_smooth[faces]
+    (loops, corner) = face_loops(faces, loop_starts, loop_totals)
+    face_totals = np.repeat(totals, totals)
+    # reversed within every face
+    loops += face_totals - 1 - 2 * corner
+    first = np.repeat(starts, totals) + 1 + corner
+    values[first] = loop_verts[loops]
+    if loop_uvs is not None:
+        values[first + face_totals] = loop_uvs[loops]
+    return template % tuple(values.tolist())
+
+
+def face_loops(faces, loop_starts, loop_totals):
+    # Loop indices of the faces one after the other,
+    # and the corner number of each within its face
+    totals = loop_totals[faces]
+    corner = np.arange(int(totals.sum())) - np.repeat(np.cumsum(totals) - totals, totals)
+    return (np.repeat(loop_starts[faces], totals) + corner, corner)
+
+
+def face_template(count, uvs):
+    # Format of a face record with count corners, cached per count
+    key = (count, uvs)
+    template = FACE_TEMPLATES.get(key)
+    if template is None:
+        template = "\t\t\tface\n\t\t\t{\n\t\t\t\tcount %d;\n\t\t\t\tverts " + " %d" * count + ";\n"
+        if uvs:
+            template += "\t\t\t\tuvs " + " %d" * count + ";\n"
+        template += "\t\t\t\tsmoothGroup %d;\n\t\t\t}\n"
+        FACE_TEMPLATES[key] = template
+    return template
+
+
+def uv_index(uv_pos, unique_uvs_pos, new_mesh_uvs):
+    # Index of a welded uv, unique_uvs_pos maps
+    # (u, v) to its index in the order first seen
+    idx = unique_uvs_pos.get(uv_pos)
+    if idx is None:
+        idx = unique_uvs_pos[uv_pos] = len(unique_uvs_pos)
+        new_mesh_uvs.append(uv_pos)
+    return idx
+
+
+class DMeshSections:
+    """Text sections of a .dmesh file, streamed as objects are exported.
+
+    Vertices, uvs, weights and faces each go to one spooled temporary
+    file, opened on the first write and kept in memory up to
+    SECTION_SPOOL characters. Groups are spans of the faces section.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.groups = {}
+
+    def _file(self, name):
+        section = self.files.get(name)
+        if section is None:
+            section = self.files[name] = tempfile.SpooledTemporaryFile(
+                max_size=SECTION_SPOOL, mode='w+', encoding='utf-8')
+        return section
+
+    def write(self, name, text):
+        self._file(name).write(text)
+
+    def write_group(self, group_name, text):
+        # Faces of a group, remembered as (start, length) spans
+        faces = self._file('faces')
+        start = faces.tell()
+        faces.write(text)
+        self.groups.setdefault(group_name, []).append((start, len(text)))
+
+    def copy(self, f, name):
+        # Append a whole section to the output file
+        section = self.files.get(name)
+        if section is not None:
+            section.seek(0)
+            shutil.copyfileobj(section, f, WRITE_BUFFER)
+
+    def copy_group(self, f, group_name):
+        # Append the faces of a group to the output file
+        faces = self.files['faces']
+        for (start, length) in self.groups[group_name]:
+            faces.seek(start)
+            while length > 0:
+                block = faces.read(min(length, WRITE_BUFFER))
+                if not block:
+                    break
+                f.write(block)
+                length -= len(block)
+
+    def close(self):
+        # Release the files, the sections start over empty
+        for section in self.files.values():
+            section.close()
+        self.files = {}
+        self.groups = {}
+
+
 def reset_variables():
-    vertex_output = []
-    uvs_output = []
-    groups_output = {}
+    # Counts of the sections, written once the file is assembled
     groups_count = {}
     joints_output = []
-    weights_output = []
     weights_count = 0
     group_count = 0
     base_vertex_index = 0
     base_uv_index = 0
     armature = None
-    unique_uvs_pos = []
-    uvs_dict = []
+    unique_uvs_pos = {}
 
-    return (vertex_output, uvs_output, groups_output, groups_count,
-            joints_output, weights_output, weights_count, group_count,
-            base_vertex_index, base_uv_index, armature, unique_uvs_pos, uvs_dict)
+    return (groups_count, joints_output, weights_count, group_count,
+            base_vertex_index, base_uv_index, armature, unique_uvs_pos)
 
 
 def to_file(separate_files, filepath, group_name, base_vertex_index,
-            vertex_output, unique_uvs_pos, uvs_output, groups_output,
-            groups_count, joints_output, weights_count, weights_output):
+            unique_uvs_pos, groups_count, joints_output, weights_count, sections):
 
     if separate_files:
         folder_path, basename = (os.path.split(filepath))
@@ -595,25 +862,25 @@ def to_file(separate_files, filepath, group_name, base_vertex_index,
         filepath = os.path.join(folder_path, "{}{}".format(group_name, ext))
 
     # Write file contents
-    with open(filepath, 'w', encoding='utf-8') as f:
+    with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
         f.write("HD_DATA_TXT 300\n\n")
         f.write("mesh\n{\n")
         f.write("\tverts %d\n\t{\n" % base_vertex_index)
-        f.write("".join(vertex_output))
+        sections.copy(f, 'verts')
         f.write("\t}\n")
         f.write("\tuvs %d\n\t{\n" % len(unique_uvs_pos))
-        f.write("".join(uvs_output))
+        sections.copy(f, 'uvs')
         f.write("\t}\n")
-        f.write("\tgroups %d\n\t{\n" % len(groups_output))
-        for name, contents in groups_output.items():
+        f.write("\tgroups %d\n\t{\n" % len(sections.groups))
+        for name in sections.groups:
             f.write("\t\tgroup %s %d\n\t\t{\n" % (name, groups_count[name]))
-            f.write("".join(contents))
+            sections.copy_group(f, name)
             f.write("\t\t}\n")
         f.write("\t}\n")
         f.write("".join(joints_output))
         if weights_count > 0:
             f.write("\tweights %d\n\t{\n" % weights_count)
-            f.write("".join(weights_output))
+            sections.copy(f, 'weights')
             f.write("\t}\n")
         f.write("}\n")
 
@@ -674,6 +941,146 @@ class ExportHaydeeDMesh(Operator, ExportHelper):
                            self.ignore_hidden, self.material, self.file_format)
 
 
+# --------------------------------------------------------------------------------
+#  .mesh exporter
+# --------------------------------------------------------------------------------
+
+# Experimental, the layout follows what read_mesh reads and is not
+# checked against game files. read_mesh skips the entry table and
+# reads the data in order: vertex and index counts, two corners of
+# the bounds (posTop, posBottom), the 60 bytes vertices, then the
+# indices. Entry names, the order of the corners (written min, max)
+# and the vertex colors (white) are not confirmed.
+
+def mesh_corners(ob, mesh, file_format):
+    # Triangulated corners of an object in world space:
+    # vertex index, uv and normal of every corner, vertex positions
+    mesh.calc_loop_triangles()
+    if hasattr(mesh, 'calc_normals_split'):
+        # Blender 4.1+ keeps the corner normals up to date
+        mesh.calc_normals_split()
+    loopCount = len(mesh.loops)
+    tri_loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", tri_loops)
+    loop_verts = np.empty(loopCount, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_normals = np.empty(loopCount * 3, dtype=np.float32)
+    mesh.loops.foreach_get("normal", loop_normals)
+    loop_uvs = np.empty(loopCount * 2, dtype=np.float32)
+    mesh.uv_layers[0].data.foreach_get("uv", loop_uvs)
+    loop_uvs = loop_uvs.reshape(-1, 2)
+    if (file_format == 'H2'):
+        loop_uvs[:, 1] = 1 - loop_uvs[:, 1]
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+
+    mat = np.array(ob.matrix_world)
+    positions = positions.reshape(-1, 3) @ mat[:3, :3].T + mat[:3, 3]
+    # normals follow the inverse transpose
+    loop_normals = loop_normals.reshape(-1, 3) @ np.linalg.inv(mat[:3, :3])
+    loop_normals /= np.maximum(np.linalg.norm(loop_normals, axis=1, keepdims=True), 1e-12)
+    return (loop_verts[tri_loops], loop_uvs[tri_loops], loop_normals[tri_loops], positions)
+
+
+def write_mesh(operator, context, filepath, apply_modifiers, selected_only,
+               ignore_hidden, file_format):
+    if selected_only:
+        list = context.selected_objects
+        if len(list) == 0:
+            list = context.scene.objects
+    else:
+        list = context.scene.objects
+
+    depsgraph = context.evaluated_depsgraph_get()
+    vertex_blocks = []
+    index_blocks = []
+    vertCount = 0
+    for ob in sorted([x for x in list if x.type == 'MESH'], key=lambda ob: ob.name):
+        if ignore_hidden and ob.hide_viewport:
+            continue
+        ob_for_convert = ob.evaluated_get(depsgraph) if apply_modifiers else ob.original
+        mesh = ob_for_convert.to_mesh()
+        if not len(mesh.uv_layers):
+            operator.report({'ERROR'}, "Mesh " + ob.name + " is missing UV information")
+            ob_for_convert.to_mesh_clear()
+            continue
+        (corner_verts, corner_uvs, corner_normals, positions) = mesh_corners(ob, mesh, file_format)
+        ob_for_convert.to_mesh_clear()
+
+        # One file vertex per (vertex, uv, normal), tangents follow the split
+        (first, corner_index) = split_vertices(corner_verts, corner_uvs, corner_normals)
+        verts = np.zeros(len(first), dtype=MESH_VERT_DTYPE)
+        positions = positions[corner_verts[first]]
+        uvs = corner_uvs[first]
+        normals = corner_normals[first]
+        tris = corner_index.reshape(-1, 3)
+        (tangents, bitangents) = vertex_tangents(positions, uvs, normals, tris)
+        verts['pos'] = to_haydee(positions)
+        verts['uv'] = uvs
+        verts['color'] = 255
+        verts['normal'] = to_haydee(normals)
+        verts['tangent'] = to_haydee(tangents)
+        verts['bitangent'] = to_haydee(bitangents)
+        vertex_blocks.append(verts)
+        # reverse winding
+        index_blocks.append(tris[:, ::-1] + vertCount)
+        vertCount += len(verts)
+
+    if not vertex_blocks:
+        operator.report({'ERROR'}, "No mesh to export")
+        return {'FINISHED'}
+
+    verts = np.concatenate(vertex_blocks)
+    indices = np.concatenate(index_blocks).astype('<u4')
+    info = struct.pack('II3f3f', len(verts), indices.size,
+                       *verts['pos'].min(axis=0), *verts['pos'].max(axis=0))
+    write_chunk_file(filepath, 'mesh', [
+        ('info', info),
+        ('verts', verts),
+        ('indices', indices),
+    ])
+    return {'FINISHED'}
+
+
+class ExportHaydeeMesh(Operator, ExportHelper):
+    bl_idname = "haydee_exporter.mesh"
+    bl_label = "Export Haydee mesh (.mesh, experimental)"
+    bl_description = "Export a Haydee mesh, the binary layout is not checked against game files"
+    bl_options = {'REGISTER'}
+    filename_ext = ".mesh"
+    filter_glob: StringProperty(
+        default="*.mesh",
+        options={'HIDDEN'},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+
+    file_format: file_format_prop
+
+    selected_only: BoolProperty(
+        name="Selected only",
+        description="Export only selected objects (if nothing is selected, full scene will be exported regardless of this setting)",
+        default=True,
+    )
+    ignore_hidden: BoolProperty(
+        name="Ignore hidden",
+        description="Ignore hidden objects",
+        default=True,
+    )
+    apply_modifiers: BoolProperty(
+        name="Apply modifiers",
+        description="Apply modifiers before exporting",
+        default=True,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        return write_mesh(self, context, self.filepath, self.apply_modifiers,
+                          self.selected_only, self.ignore_hidden, self.file_format)
+
+
 # --------------------------------------------------------------------------------
 #  Initialization & menu
 # --------------------------------------------------------------------------------
@@ -684,9 +1091,11 @@ class HaydeeExportSubMenu(bpy.types.Menu):
     def draw(self, context):
         layout = self.layout
         layout.operator(ExportHaydeeDMesh.bl_idname, text="Haydee DMesh (.dmesh)")
+        layout.operator(ExportHaydeeMesh.bl_idname, text="Haydee Mesh (.mesh, experimental)")
         layout.operator(ExportHaydeeDSkel.bl_idname, text="Haydee DSkel (.dskel)")
         layout.operator(ExportHaydeeDPose.bl_idname, text="Haydee DPose (.dpose)")
         layout.operator(ExportHaydeeDMotion.bl_idname, text="Haydee DMotion (.dmot)")
+        layout.operator(ExportHaydeeMotion.bl_idname, text="Haydee Motion (.motion, experimental)")
 
 
 def menu_func_export(self, context):
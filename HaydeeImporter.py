@@ -5,16 +5,24 @@ import struct
 import os
 import io
 import binascii
-import codecs
 from enum import Enum
 from math import pi
 from io import BytesIO
+import numpy as np
 
 # Blender and own imports
 import bpy
 from .HaydeeUtils import d, find_armature, file_format_prop
 from .HaydeeUtils import boneRenameBlender, decodeText
 from .HaydeeNodeMat import create_material
+from .HaydeeChunk import HdChunkFile, Signature
+from .HaydeeText import parse_data_txt, parse_floats
+from .HaydeeSkeleton import parent_indices, hierarchy_order, quaternion_matrices
+from .HaydeeSkeleton import edit_bone_matrices, world_matrices, bone_tails, bone_rolls, roll_matrices
+from .HaydeeMotion import key_matrices, motion_root_matrices, dmot_root_matrices, pose_channels
+from .HaydeeMotion import frame_selection, bone_selection, reduce_keys
+from .HaydeeMotion import quaternion_matrices, matrix_eulers, quaternion_axis_angles
+from .HaydeeMesh import MESH_VERT_DTYPE
 from .timing import profile
 from . import HaydeeMenuIcon
 from bpy_extras.wm_utils.progress_report import (
@@ -24,81 +32,58 @@ from bpy_extras.wm_utils.progress_report import (
 # ImportHelper is a helper class, defines filename and
 # invoke() function which calls the file selector.
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty
 from bpy.types import Operator
 from mathutils import Quaternion, Vector, Matrix
 
 
-# Global enum for asset type
-class Signature(Enum):
-    HD_CHUNK = 0
-    HD_DATA_TXT = 1
-    HD_DATA_TXT_BOM = 2
-    HD_MOTION = 3
-
 # Constants
 
 ARMATURE_NAME = 'Skeleton'
-HD_CHUNK = b'\x48\x44\x5F\x43\x48\x55\x4E\x4B'
-HD_DATA_TXT = b'\x48\x44\x5F\x44\x41\x54\x41\x5F\x54\x58\x54'
-HD_DATA_TXT_BOM = b'\xFF\xFE\x48\x00\x44\x00\x5F\x00\x44\x00\x41\x00\x54\x00\x41\x00\x5F\x00\x54\x00\x58\x00\x54\x00'
-HD_MOTION = b'\x48\x44\x5F\x4D\x4F\x54\x49\x4F\x4E\x00'
 
 # Swap matrix rows
-SWAP_ROW_SKEL = Matrix(((0, 0, 1, 0),
-                        (1, 0, 0, 0),
-                        (0, 1, 0, 0),
-                        (0, 0, 0, 1)))
+SWAP_ROW_SKEL = np.array(((0, 0, 1, 0),
+                          (1, 0, 0, 0),
+                          (0, 1, 0, 0),
+                          (0, 0, 0, 1)))
 # Swap matrix cols
-SWAP_COL_SKEL = Matrix(((1, 0, 0, 0),
-                        (0, 0, -1, 0),
-                        (0, -1, 0, 0),
+SWAP_COL_SKEL = np.array(((1, 0, 0, 0),
+                          (0, 0, -1, 0),
+                          (0, -1, 0, 0),
+                          (0, 0, 0, 1)))
+# Swap matrix rows/cols of .skel root bones
+SWAP_ROW_SKEL_ROOT = np.array(((-1, 0, 0, 0),
+                               (0, 0, -1, 0),
+                               (0, 1, 0, 0),
+                               (0, 0, 0, 1)))
+SWAP_COL_SKEL_ROOT = np.array(((0, 1, 0, 0),
+                               (0, 0, 1, 0),
+                               (1, 0, 0, 0),
+                               (0, 0, 0, 1)))
+# Swap matrix rows/cols of .skel child bones (relative to parent)
+SWAP_ROW_SKEL_CHILD = np.array(((0, 0, -1, 0),
+                                (1, 0, 0, 0),
+                                (0, 1, 0, 0),
+                                (0, 0, 0, 1)))
+SWAP_COL_SKEL_CHILD = np.array(((0, 1, 0, 0),
+                                (0, 0, 1, 0),
+                                (-1, 0, 0, 0),
+                                (0, 0, 0, 1)))
+# Swap matrix rows/cols of .dmesh child bones (relative to parent)
+SWAP_ROW_DMESH_CHILD = np.array(((-1, 0, 0, 0),
+                                 (0, 0, 1, 0),
+                                 (0, -1, 0, 0),
+                                 (0, 0, 0, 1)))
+SWAP_COL_DMESH_CHILD = np.array(((1, 0, 0, 0),
+                                 (0, 0, 1, 0),
+                                 (0, 1, 0, 0),
+                                 (0, 0, 0, 1)))
+# Rotation of .skel bones not in the root chain
+ROTATE_SKEL = np.array(((0, 1, 0, 0),
+                        (-1, 0, 0, 0),
+                        (0, 0, 1, 0),
                         (0, 0, 0, 1)))
 
-# --------------------------------------------------------------------------------
-# binary helpers
-# --------------------------------------------------------------------------------
-def sig_check(mview):
-    result = None
-    if (mview[0:8] == (HD_CHUNK)):
-        result = Signature.HD_CHUNK
-    elif (mview[0:11] == (HD_DATA_TXT)):
-        result = Signature.HD_DATA_TXT
-    elif (mview[0:24] == (HD_DATA_TXT_BOM)):
-        result = Signature.HD_DATA_TXT_BOM
-    elif (mview[0:10] == (HD_MOTION)):
-        result = Signature.HD_MOTION
-    return result
-
-# Read prefixed ANSI/utf8-as-ansi string
-def readStrA(start, data):
-    len = int.from_bytes(data[start:start+4], byteorder='little')
-    start += 4
-    return (data[start:start+len].decode("utf-8"), 4+len+1)
-
-# Read property name (until null terminator)
-def readStrA_term(start, maxLen, data):
-    i, tStr, found = -1, "", False
-    while (i < maxLen):
-        i += 1
-        if (data[start+i] <= 0):
-            found = True
-            break
-    if (found):
-        tStr = codecs.decode(data[start:start+i], "latin")
-    return (tStr,i)
-
-# Read UTF16/wide string
-def readStrW(start, data):
-    i = int.from_bytes(data[start:start+4], byteorder='little')
-    len = (i * 2)
-    start += 4
-    return (codecs.decode(data[start:start+len], "utf-16-le"), 4+len+2)
-
-# Vector from Haydee format to Blender
-def vectorSwapSkel(vec):
-    return Vector((-vec.z, vec.y, -vec.x))
-
 
 def createCollection(name="Haydee Model"):
     # Create a collection with specific name
@@ -131,55 +116,88 @@ def setActiveCollection(collName):
         bpy.context.view_layer.active_layer_collection = layerColl
 
 
+def build_mesh(name, coords, loop_verts, loop_totals, loop_uvs=None):
+    # Create a smooth shaded mesh from flat coords, loop vertex indices,
+    # polygon sizes and (optional) per loop uvs
+    coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1)
+    loop_verts = np.ascontiguousarray(loop_verts, dtype=np.int32).reshape(-1)
+    loop_totals = np.ascontiguousarray(loop_totals, dtype=np.int32).reshape(-1)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+
+    mesh_data = bpy.data.meshes.new(name)
+    mesh_data.vertices.add(len(coords) // 3)
+    mesh_data.loops.add(len(loop_verts))
+    mesh_data.polygons.add(len(loop_totals))
+    mesh_data.vertices.foreach_set("co", coords)
+    mesh_data.loops.foreach_set("vertex_index", loop_verts)
+    mesh_data.polygons.foreach_set("loop_start", loop_starts)
+    mesh_data.polygons.foreach_set("loop_total", loop_totals)
+    # Shade smooth
+    mesh_data.polygons.foreach_set("use_smooth", np.ones(len(loop_totals), dtype=bool))
+    mesh_data.use_auto_smooth = True
+    mesh_data.auto_smooth_angle = pi
+    mesh_data.update(calc_edges=True)
+
+    if loop_uvs is not None:
+        blen_uvs = mesh_data.uv_layers.new()
+        blen_uvs.data.foreach_set("uv", np.ascontiguousarray(loop_uvs, dtype=np.float32).reshape(-1))
+    return mesh_data
+
+
+def set_edit_bones(armature_da, heads, tails, rolls):
+    # Place all edit bones (in creation order) at once
+    edit_bones = armature_da.edit_bones
+    edit_bones.foreach_set("head", np.ascontiguousarray(heads, dtype=np.float32).reshape(-1))
+    edit_bones.foreach_set("tail", np.ascontiguousarray(tails, dtype=np.float32).reshape(-1))
+    edit_bones.foreach_set("roll", np.ascontiguousarray(rolls, dtype=np.float32).reshape(-1))
+
+
+def add_vertex_weights(mesh_obj, groupNames, vertIdx, groupIdx, weights):
+    # Assign weights with one vertex_groups.add() per (group, weight) bucket.
+    # groupNames maps groupIdx to a vertex group name (None to skip it)
+    vertIdx = np.asarray(vertIdx, dtype=np.int64).reshape(-1)
+    groupIdx = np.asarray(groupIdx, dtype=np.int64).reshape(-1)
+    weights = np.asarray(weights, dtype=np.float32).reshape(-1)
+    valid = np.array([name is not None for name in groupNames] + [False], dtype=bool)
+    keep = valid[np.clip(groupIdx, -1, len(groupNames))]
+    vertIdx, groupIdx, weights = vertIdx[keep], groupIdx[keep], weights[keep]
+    if not len(vertIdx):
+        return
+
+    # Keep only the last weight of each (group, vert), as sequential 'REPLACE' did
+    key = groupIdx * (int(vertIdx.max()) + 1) + vertIdx
+    last = len(key) - 1 - np.unique(key[::-1], return_index=True)[1]
+    vertIdx, groupIdx, weights = vertIdx[last], groupIdx[last], weights[last]
+
+    order = np.lexsort((weights, groupIdx))
+    vertIdx, groupIdx, weights = vertIdx[order], groupIdx[order], weights[order]
+    bounds = np.flatnonzero((groupIdx[1:] != groupIdx[:-1]) | (weights[1:] != weights[:-1])) + 1
+    starts = [0] + bounds.tolist()
+    ends = bounds.tolist() + [len(vertIdx)]
+    for start, end in zip(starts, ends):
+        groupName = groupNames[groupIdx[start]]
+        vertGroup = mesh_obj.vertex_groups.get(groupName)
+        if not vertGroup:
+            vertGroup = mesh_obj.vertex_groups.new(name=groupName)
+        vertGroup.add(vertIdx[start:end].tolist(), float(weights[start]), 'REPLACE')
+
+
 # --------------------------------------------------------------------------------
 # .skel importer
 # --------------------------------------------------------------------------------
 
-def recurBonesOrigin(progress, parentBone, jointNames, mats):
-    for childBone in parentBone.children:
-        if childBone:
-            idx = jointNames.index(childBone.name)
-            child_mat = mats[idx]
-            # INV row
-            x1 = Matrix(((0, 0, -1, 0),
-                         (1, 0, 0, 0),
-                         (0, 1, 0, 0),
-                         (0, 0, 0, 1)))
-            # INV col
-            x2 = Matrix(((0, 1, 0, 0),
-                         (0, 0, 1, 0),
-                         (-1, 0, 0, 0),
-                         (0, 0, 0, 1)))
-
-            childBone.matrix = parentBone.matrix @ (x1 @ child_mat @ x2)
-            recurBonesOrigin(progress, childBone, jointNames, mats)
-            progress.step()
-
-
-def rotateNonRootBone(parentBone):
-    if ('root' in parentBone.name.lower()):
-        return
-    r = Quaternion((0, 0, 1), -pi / 2).to_matrix().to_4x4()
-    parentBone.matrix = r @ parentBone.matrix
-    for childBone in parentBone.children:
-        rotateNonRootBone(childBone)
-
 # Parse bone data helper
-def read_bone_data(memData, propMap, jointNames, jointParents, mats, dimensions):
-    boneCount = propMap['numBones']['value']
-    BONE_SIZE = int(propMap['bones']['size'] / boneCount)
-    unpack_bone = struct.Struct('<32s16fi3fi').unpack
-    for n in range(boneCount):
-        offset = (BONE_SIZE * n)
-        (name,
+def read_bone_data(chunk, jointNames, jointParents, mats, dimensions):
+    boneCount = chunk.read_int('numBones', 0)
+    for (name,
             f1, f2, f3, f4,
             f5, f6, f7, f8,
             f9, f10, f11, f12,
             f13, f14, f15, f16,
-            parent, width, height, lenght, flags) = unpack_bone(memData[offset:offset + BONE_SIZE])
+            parent, width, height, lenght, flags) in chunk.read_records('bones', '<32s16fi3fi', boneCount):
 
-        name = readStrA_term(0, 32, memoryview(name))[0]
-        name = boneRenameBlender(name)
+        name = boneRenameBlender(decodeText(name))
         mat = Matrix(((f1, f5, f9, f13),
                         (f2, f6, f10, f14),
                         (f3, f7, f11, f15),
@@ -191,19 +209,15 @@ def read_bone_data(memData, propMap, jointNames, jointParents, mats, dimensions)
     return True
 
 # Parse joint data helper
-def read_joint_data(memData, propMap, joint_data):
-    joints_count = propMap['numJoints']['value']
-    JOINT_SIZE = int(propMap['joints']['size'] / joints_count)
-    unpack_joint = struct.Struct('<18f4f').unpack
-    for n in range(joints_count):
-        offset = (JOINT_SIZE * n)
-        (
+def read_joint_data(chunk, joint_data):
+    joints_count = chunk.read_int('numJoints', 0)
+    for (
             index, parent,
             f1, f2, f3, f4,
             f5, f6, f7, f8,
             f9, f10, f11, f12,
             f13, f14, f15, f16,
-            twistX, twistY, swingX, swingY) = unpack_joint(memData[offset:offset + JOINT_SIZE])
+            twistX, twistY, swingX, swingY) in chunk.read_records('joints', '<18f4f', joints_count):
 
         mat = Matrix((
                     (f1, f5, f9, f13),
@@ -221,62 +235,30 @@ def read_joint_data(memData, propMap, joint_data):
     return True
 
 # Parse fixes data
-def read_fixes_data(memData, propMap, fix_data):
-    fixes_count = propMap['numFixes']['value']
-    FIXES_SIZE = int(propMap['fixes']['size'] / fixes_count)
-    unpack_fixes = struct.Struct('<5I').unpack
-    for n in range(fixes_count):
-        offset = (FIXES_SIZE * n)
-        (type, flags, fix1, fix2, index) = unpack_fixes(memData[offset:offset + FIXES_SIZE])
+def read_fixes_data(chunk, fix_data):
+    fixes_count = chunk.read_int('numFixes', 0)
+    for (type, flags, fix1, fix2, index) in chunk.read_records('fixes', '<5I', fixes_count):
         fix_data[index] = ({'type': type, 'flags': flags, 'fix1': fix1, 'fix2': fix2})
     return True
 def read_skel(operator, context, filepath):
     print('skel:', filepath)
-    with open(filepath, "rb") as a_file:
-        data = a_file.read()
-    mview = memoryview(data)
-
-    (entries, serialSize, assType) = struct.unpack('<ii8s', mview[20:36])
-    assType = assType.decode("latin")
-
-    if (sig_check(mview) != Signature.HD_CHUNK or assType != 'skeleton'):
-        print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(mview[0:16]), assType))
-        operator.report({'ERROR'}, "Unrecognized file format")
-        return {'FINISHED'}
-
-    # Compiled structs
-    unpack_int = struct.Struct('<i').unpack
-    unpack_entry = struct.Struct('<32siiii').unpack
 
     # Data
     jointNames, jointParents, mats, dimensions = [], [], [], []
     joint_data, fix_data = {}, {}
     armature_ob = None
 
-    propMap = dict(numBones=   {'reader': lambda x: unpack_int(x)[0]},
-                   numJoints=  {'reader': lambda x: unpack_int(x)[0]},
-                   numFixes=   {'reader': lambda x: unpack_int(x)[0]},
-                   numBounds=  {'reader': lambda x: unpack_int(x)[0]},
-                   numTrackers={'reader': lambda x: unpack_int(x)[0]},
-                   numSlots=   {'reader': lambda x: unpack_int(x)[0]},
-                   bones=      {'reader': lambda x: read_bone_data(x, propMap, jointNames, jointParents, mats, dimensions)},
-                   fixes=      {'reader': lambda x: read_fixes_data(x, propMap, fix_data)},
-                   joints=     {'reader': lambda x: read_joint_data(x, propMap, joint_data)},
-                   slots=      {'reader': lambda x: print("Skipping slots since this data is irrelevant")})
-
-    dataOffset = 28 + (entries * 48)
-
-    for x in range(1, entries):
-        sPos = 28 + (x * 48)
-        (name, size, offset, numSubs, subs) = unpack_entry(mview[sPos:sPos+48])
-        name = readStrA_term(0, 32, memoryview(name))[0]
-        propMap[name].update(dict(zip(['size', 'offset', 'numSubs', 'subs', 'hasValue'],[size, offset, numSubs, subs, size > 0])))
-
-    for key, value in propMap.items():
-        if (value.get("hasValue")):
-            (f, lSize, lOff) = (value['reader'], value['size'], value['offset'])
-            lOff = dataOffset + lOff
-            value["value"] = f(mview[lOff:lOff+lSize])
+    with HdChunkFile(filepath) as chunk:
+        if (chunk.signature != Signature.HD_CHUNK or chunk.asset_type != 'skeleton'):
+            print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(chunk.view[0:16]), chunk.asset_type))
+            operator.report({'ERROR'}, "Unrecognized file format")
+            return {'FINISHED'}
+
+        read_bone_data(chunk, jointNames, jointParents, mats, dimensions)
+        read_fixes_data(chunk, fix_data)
+        read_joint_data(chunk, joint_data)
+        if 'slots' in chunk:
+            print("Skipping slots since this data is irrelevant")
 
     print(fix_data)
     with ProgressReport(context.window_manager) as progReport:
@@ -307,62 +289,48 @@ def read_skel(operator, context, filepath):
 
                 # create all Bones
                 progress.enter_substeps(boneCount, "create bones")
+                editBones = []
                 for idx, jointName in enumerate(jointNames):
-                    editBone = armature_ob.data.edit_bones.new(jointName)
-                    editBone.tail = Vector(editBone.head) + Vector((0, 0, 1))
-                    editBone.length = dimensions[idx][2]
+                    editBones.append(armature_ob.data.edit_bones.new(jointName))
                     progress.step()
                 progress.leave_substeps("create bones end")
 
                 # set all bone parents
                 progress.enter_substeps(boneCount, "parenting bones")
-                for idx, jointParent in enumerate(jointParents):
-                    if (jointParent >= 0):
-                        editBone = armature_da.edit_bones[idx]
-                        editBone.parent = armature_da.edit_bones[jointParent]
+                parents = parent_indices(jointNames, jointParents)
+                for idx, parent in enumerate(parents):
+                    if (parent >= 0):
+                        editBones[idx].parent = editBones[parent]
                     progress.step()
                 progress.leave_substeps("parenting bones end")
 
                 # origins of each bone is relative to its parent
                 # recalc all origins
-                progress.enter_substeps(boneCount, "aligning bones")
-                rootBones = [rootBone for rootBone in armature_da.edit_bones if rootBone.parent is None]
-
-                # swap rows root bones
-                swap_rows = Matrix(((-1, 0, 0, 0),
-                                    (0, 0, -1, 0),
-                                    (0, 1, 0, 0),
-                                    (0, 0, 0, 1)))
-                # swap cols root bones
-                swap_cols = Matrix(((0, 1, 0, 0),
-                                    (0, 0, 1, 0),
-                                    (1, 0, 0, 0),
-                                    (0, 0, 0, 1)))
-
-                for rootBone in rootBones:
-                    idx = jointNames.index(rootBone.name)
-                    mat = mats[idx]
-                    rootBone.matrix = swap_rows @ mat @ swap_cols
-                    recurBonesOrigin(progress, rootBone, jointNames, mats)
-                    progress.step()
-                progress.leave_substeps("aligning bones end")
-
+                progress.enter_substeps(1, "aligning bones")
+                isRoot = np.array(parents) < 0
+                local = np.array(mats, dtype=np.float64)
+                local[isRoot] = SWAP_ROW_SKEL_ROOT @ local[isRoot] @ SWAP_COL_SKEL_ROOT
+                local[~isRoot] = SWAP_ROW_SKEL_CHILD @ local[~isRoot] @ SWAP_COL_SKEL_CHILD
+                world = edit_bone_matrices(world_matrices(parents, local))
+                heads = world[:, :3, 3]
+                rolls = bone_rolls(world, heads, heads + world[:, :3, 1])
                 # lenght of bones
-                for bone in armature_da.edit_bones:
-                    for child in bone.children:
-                        center = child.head
-                        proxVec = center - bone.head
-                        boneVec = bone.tail - bone.head
-                        norm = proxVec.dot(boneVec) / boneVec.dot(boneVec)
-                        if (norm > 0.1):
-                            proyVec = norm * boneVec
-                            dist = (proxVec - proyVec).length
-                            if (dist < 0.001):
-                                bone.tail = center
+                tails = bone_tails(parents, world, [dim[2] for dim in dimensions])
 
                 # Rotate bone not in 'SK_Root' chain
-                for bone in rootBones:
-                    rotateNonRootBone(bone)
+                rotated = [False] * boneCount
+                for idx in hierarchy_order(parents):
+                    parent = parents[idx]
+                    rotated[idx] = ((parent < 0 or rotated[parent]) and 'root' not in jointNames[idx].lower())
+                if any(rotated):
+                    rotated = np.array(rotated)
+                    mat = ROTATE_SKEL @ roll_matrices(heads[rotated], tails[rotated], rolls[rotated])
+                    tails[rotated] = tails[rotated] @ ROTATE_SKEL[:3, :3].T
+                    heads[rotated] = mat[:, :3, 3]
+                    rolls[rotated] = bone_rolls(mat, heads[rotated], tails[rotated])
+
+                set_edit_bones(armature_da, heads, tails, rolls)
+                progress.leave_substeps("aligning bones end")
 
                 bpy.ops.object.mode_set(mode='OBJECT')
                 progress.leave_substeps("Build armature end")
@@ -516,25 +484,6 @@ def read_dskel(operator, context, filepath):
     with ProgressReport(context.window_manager) as progReport:
         with ProgressReportSubstep(progReport, 4, "Importing dskel", "Finish Importing dskel") as progress:
 
-            data = None
-            encoding = "utf-8-sig"
-            with open(filepath, "r", encoding=encoding) as a_file:
-                data = io.StringIO(a_file.read())
-
-            line = stripLine(data.readline())
-            line_split = line.split()
-            line_start = line_split[0]
-            signature = line_start
-
-            print('Signature:', signature)
-            if signature != 'HD_DATA_TXT':
-                print("Unrecognized signature: %s" % signature)
-                operator.report({'ERROR'}, "Unrecognized file format")
-                return {'FINISHED'}
-
-            level = 0
-            boneCount = 0
-            jointName = None
             jointNames = []
             jointOrigin = []
             jointAxis = []
@@ -543,43 +492,48 @@ def read_dskel(operator, context, filepath):
             jointHeight = []
             jointLength = []
 
-            # steps = len(data.getvalue().splitlines()) - 1
+            # Joints
+            def bone(level, rest):
+                if (level == 1):
+                    jointNames.append(rest.split()[0])
+                    jointParents.append(None)
+
+            def parent(level, rest):
+                if (level >= 2):
+                    jointParents[len(jointParents) - 1] = rest.split()[0]
+
+            def vec(vec_data, vec_len):
+                def handler(level, rest):
+                    if (level >= 2):
+                        readVec(rest, vec_data, vec_len, float)
+                return handler
+
+            def value(values):
+                def handler(level, rest):
+                    if (level >= 2):
+                        values.append(float(rest.split()[0]))
+                return handler
+
+            handlers = {
+                'bone': bone,
+                'parent': parent,
+                'origin': vec(jointOrigin, 3),
+                'axis': vec(jointAxis, 4),
+                'width': value(jointWidth),
+                'height': value(jointHeight),
+                'length': value(jointLength),
+            }
+
             progress.enter_substeps(1, "Parse Data")
             # Read model data
-            for lineData in data:
-                line = stripLine(lineData)
-                line_split = line.split()
-                line_start = None
-                i = len(line_split)
-                if (i == 0):
-                    continue
-                line_start = line_split[0]
-                if (line_start in ('{')):
-                    level += 1
-                if (line_start in ('}')):
-                    level -= 1
-                    contextName = None
-
-                # Joints
-                if (line_start == 'skeleton' and level == 0):
-                    boneCount = line_split[1]
-                if (line_start == 'bone' and level == 1):
-                    jointName = line_split[1]
-                    jointNames.append(jointName)
-                    jointParents.append(None)
-                if (line_start == 'parent' and level >= 2):
-                    jointParents[len(jointParents) - 1] = line_split[1]
-                if (line_start == 'origin' and level >= 2):
-                    readVec(line_split, jointOrigin, 3, float)
-                if (line_start == 'axis' and level >= 2):
-                    readVec(line_split, jointAxis, 4, float)
-
-                if (line_start == 'width' and level >= 2):
-                    jointWidth.append(float(line_split[1]))
-                if (line_start == 'height' and level >= 2):
-                    jointHeight.append(float(line_split[1]))
-                if (line_start == 'length' and level >= 2):
-                    jointLength.append(float(line_split[1]))
+            signature = parse_data_txt(filepath, handlers)
+            progress.leave_substeps("Parse Data end")
+
+            print('Signature:', signature)
+            if signature != 'HD_DATA_TXT':
+                print("Unrecognized signature: %s" % signature)
+                operator.report({'ERROR'}, "Unrecognized file format")
+                return {'FINISHED'}
 
             for idx, name in enumerate(jointNames):
                 jointNames[idx] = boneRenameBlender(name)
@@ -613,53 +567,37 @@ def read_dskel(operator, context, filepath):
 
                 # create all Bones
                 progress.enter_substeps(boneCount, "create bones")
+                editBones = []
                 for idx, jointName in enumerate(jointNames):
-                    editBone = armature_ob.data.edit_bones.new(jointName)
-                    editBone.tail = Vector(editBone.head) + Vector((0, 0, 1))
-                    editBone.length = jointLength[idx]
+                    editBones.append(armature_ob.data.edit_bones.new(jointName))
                     progress.step()
                 progress.leave_substeps("create bones end")
 
                 # set all bone parents
                 progress.enter_substeps(boneCount, "parenting bones")
-                for idx, jointParent in enumerate(jointParents):
-                    if (jointParent):
-                        editBone = armature_da.edit_bones[idx]
-                        editBone.parent = armature_da.edit_bones[jointParent]
+                parents = parent_indices(jointNames, jointParents)
+                for idx, parent in enumerate(parents):
+                    if (parent >= 0):
+                        editBones[idx].parent = editBones[parent]
                     progress.step()
                 progress.leave_substeps("parenting bones end")
 
-                # origins of each bone is relative to its parent
-                # recalc all origins
-                progress.enter_substeps(boneCount, "aligning bones")
-
-                for edit_bone in armature_da.edit_bones:
-                    idx = jointNames.index(edit_bone.name)
-                    quat = Quaternion(jointAxis[idx])
-                    quat = Quaternion((-quat.z, quat.w, quat.y, -quat.x))
-                    mat = quat.to_matrix().to_4x4()
-                    r = Quaternion([0, 0, 1], pi / 2)
-                    boneRot = r.to_matrix().to_4x4()
-                    mat = mat @ boneRot
-                    pos = Vector(jointOrigin[idx])
-                    pos = Vector((-pos.y, -pos.z, pos.x))
-                    mat.translation = vectorSwapSkel(pos)
-                    edit_bone.matrix = mat
-                    progress.step()
-                progress.leave_substeps("aligning bones end")
-
+                # origins of each bone are absolute
+                progress.enter_substeps(1, "aligning bones")
+                quats = np.array(jointAxis, dtype=np.float64)[:, (3, 0, 2, 1)] * (-1, 1, 1, -1)
+                pos = np.array(jointOrigin, dtype=np.float64)
+                world = np.zeros((boneCount, 4, 4))
+                world[:, :3, :3] = quaternion_matrices(quats) @ ROTATE_SKEL[:3, :3].T
+                world[:, :3, 3] = pos[:, (0, 2, 1)] * (-1, -1, 1)
+                world[:, 3, 3] = 1
+                world = edit_bone_matrices(world)
+                heads = world[:, :3, 3]
+                rolls = bone_rolls(world, heads, heads + world[:, :3, 1])
                 # lenght of bones
-                for bone in armature_da.edit_bones:
-                    for child in bone.children:
-                        center = child.head
-                        proxVec = center - bone.head
-                        boneVec = bone.tail - bone.head
-                        norm = proxVec.dot(boneVec) / boneVec.dot(boneVec)
-                        if (norm > 0.1):
-                            proyVec = norm * boneVec
-                            dist = (proxVec - proyVec).length
-                            if (dist < 0.001):
-                                bone.tail = center
+                tails = bone_tails(parents, world, jointLength)
+
+                set_edit_bones(armature_da, heads, tails, rolls)
+                progress.leave_substeps("aligning bones end")
 
             bpy.ops.object.mode_set(mode='OBJECT')
             progress.leave_substeps("Build armature end")
@@ -688,49 +626,52 @@ class ImportHaydeeDSkel(Operator, ImportHelper):
 # .dmesh importer
 # --------------------------------------------------------------------------------
 
-def recurBonesOriginMesh(progress, parentBone, jointNames, jointAxis, jointOrigin):
-    for childBone in parentBone.children:
-        if childBone:
-            idx = jointNames.index(childBone.name)
-            mat = Quaternion(jointAxis[idx]).to_matrix().to_4x4()
-            pos = Vector(jointOrigin[idx])
-
-            # INV row
-            x1 = Matrix(((-1, 0, 0, 0),
-                        (0, 0, 1, 0),
-                        (0, -1, 0, 0),
-                        (0, 0, 0, 1)))
-            # INV col
-            x2 = Matrix(((1, 0, 0, 0),
-                        (0, 0, 1, 0),
-                        (0, 1, 0, 0),
-                        (0, 0, 0, 1)))
-
-            mat = parentBone.matrix @ (x1 @ mat @ x2)
-            pos = parentBone.matrix @ Vector((-pos.z, pos.x, pos.y))
-            mat.translation = pos
-            childBone.matrix = mat
-
-            recurBonesOriginMesh(progress, childBone, jointNames, jointAxis, jointOrigin)
-            progress.step()
-
-
-def coordTransform(coord):
-    return [-coord[0], -coord[2], coord[1]]
-
-
-def readVec(line_split, vec_data, vec_len, func):
-    vec = [func(v) for v in line_split[1:]]
-    vec_data.append(tuple(vec[:vec_len]))
-
-
-def readWeights(line_split, vert_data):
-    vec = tuple((int(line_split[1]), int(line_split[2]), float(line_split[3])))
-    vert_data.append(vec)
-
-
-def stripLine(line):
-    return line.strip().strip(';')
+def readVec(rest, vec_data, vec_len, func):
+    vec = [func(v) for v in rest.split()[:vec_len]]
+    vec_data.append(tuple(vec))
+
+
+def compact_indices(indices):
+    # Renumber indices to 0..n-1 in order of first appearance.
+    # Returns (used indices, renumbered indices)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    uniq, first, inverse = np.unique(indices, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return uniq[order], rank[inverse.reshape(-1)]
+
+
+def sorted_matches(sorted_values, values):
+    # Positions in sorted_values equal to each of values.
+    # Returns (positions, index in values of every position)
+    lo = np.searchsorted(sorted_values, values, 'left')
+    counts = np.searchsorted(sorted_values, values, 'right') - lo
+    owner = np.repeat(np.arange(len(values)), counts)
+    positions = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts) + lo[owner]
+    return positions, owner
+
+
+def edge_key_array(edges):
+    # (E, 2) vertex pairs to one int64 key per edge, independent of direction
+    edges = np.sort(edges, axis=1).astype(np.int64)
+    return (edges[:, 0] << 32) | edges[:, 1]
+
+
+def sharp_edge_keys(loop_verts, loop_totals, smoothGroups):
+    # Edges used by a single face of a smoothing group are on the boundry
+    # of 2 groups. Faces without smoothing group (0) are ignored
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    face_starts = np.cumsum(loop_totals) - loop_totals
+    next_loop = np.arange(len(loop_verts)) + 1
+    next_loop[face_starts + loop_totals - 1] = face_starts
+    edges = np.stack((loop_verts, loop_verts[next_loop]), axis=1)
+    loop_groups = np.repeat(np.asarray(smoothGroups, dtype=np.int64), loop_totals)
+    inGroup = loop_groups != 0
+    keys = edge_key_array(edges[inGroup])
+    group_keys, users = np.unique(np.stack((loop_groups[inGroup], keys), axis=1),
+                                  axis=0, return_counts=True)
+    return np.unique(group_keys[users == 1, 1])
 
 
 def read_dmesh(operator, context, filepath, file_format):
@@ -752,33 +693,12 @@ def read_dmesh(operator, context, filepath, file_format):
             uv_data = None
             face_data = None
 
-            progress.enter_substeps(1, "Read file")
-            data = None
-            encoding = "utf-8-sig"
-            with open(filepath, "r", encoding=encoding) as a_file:
-                data = io.StringIO(a_file.read())
-            progress.leave_substeps("Read file end")
-
-            line = stripLine(data.readline())
-            line_split = line.split()
-            line_start = line_split[0]
-            signature = line_start
-
-            print('Signature:', signature)
-            if signature != 'HD_DATA_TXT':
-                print("Unrecognized signature: %s" % signature)
-                operator.report({'ERROR'}, "Unrecognized file format")
-                return {'FINISHED'}
-
-            level = 0
             vert_data = []
             uv_data = []
             face_verts = []
             face_uvs = []
             smoothGroups = []
-            vCount = None
 
-            jointName = None
             jointNames = []
             jointOrigin = []
             jointAxis = []
@@ -790,71 +710,95 @@ def read_dmesh(operator, context, filepath, file_format):
             meshUvs = {}
             meshSmoothGroups = {}
 
-            contextName = None
-            meshName = None
+            # Current group and face vert count
+            current = {'mesh': None, 'count': None}
 
-            # steps = len(data.getvalue().splitlines()) - 1
-            progress.enter_substeps(1, "Parse Data")
-            # Read model data
-            for lineData in data:
-                line = stripLine(lineData)
-                line_split = line.split()
-                line_start = None
-                i = len(line_split)
-                if (i == 0):
-                    continue
-                line_start = line_split[0]
-                if (line_start in ('{')):
-                    level += 1
-                if (line_start in ('}')):
-                    level -= 1
-                    contextName = None
-
-                if (line_start == 'verts', 'face', 'joint'):
-                    contextName = line_start
-
-                # All verts
-                if (line_start == 'vert'):
-                    readVec(line_split, vert_data, 3, float)
-
-                # All UVs
-                if (line_start == 'uv'):
-                    readVec(line_split, uv_data, 2, float)
-
-                # Faces
-                if (line_start == 'group' and level >= 2):
-                    meshName = line_split[1]
+            # All verts
+            def vert(level, rests):
+                vert_data.append(parse_floats(rests, 3))
+
+            # All UVs
+            def uv(level, rests):
+                uv_data.append(parse_floats(rests, 2))
+
+            # Faces
+            def group(level, rest):
+                if (level >= 2):
+                    meshName = rest.split()[0]
+                    current['mesh'] = meshName
                     meshFaces[meshName] = []
                     meshUvs[meshName] = []
                     meshSmoothGroups[meshName] = []
 
-                if (line_start == 'count' and level >= 3):
-                    vCount = int(line_split[1])
-                if (line_start == 'verts' and level >= 3):
-                    readVec(line_split, meshFaces[meshName], vCount, int)
-                if (line_start == 'uvs' and level >= 3):
-                    readVec(line_split, meshUvs[meshName], vCount, int)
-                if (line_start == 'smoothGroup' and level >= 3):
-                    meshSmoothGroups[meshName].append(int(line_split[1]))
-
-                # Joints
-                if (line_start == 'joint' and level >= 2):
-                    jointName = line_split[1]
-                    jointNames.append(jointName)
+            def count(level, rest):
+                if (level >= 3):
+                    current['count'] = int(rest.split()[0])
+
+            def verts(level, rest):
+                if (level >= 3):
+                    readVec(rest, meshFaces[current['mesh']], current['count'], int)
+
+            def uvs(level, rest):
+                if (level >= 3):
+                    readVec(rest, meshUvs[current['mesh']], current['count'], int)
+
+            def smoothGroup(level, rest):
+                if (level >= 3):
+                    meshSmoothGroups[current['mesh']].append(int(rest.split()[0]))
+
+            # Joints
+            def joint(level, rest):
+                if (level >= 2):
+                    jointNames.append(rest.split()[0])
                     jointParents.append(None)
-                if (line_start == 'parent' and level >= 3):
-                    jointParents[len(jointParents) - 1] = line.split(' ', 1)[1]
-                if (line_start == 'origin' and level >= 3):
-                    readVec(line_split, jointOrigin, 3, float)
-                if (line_start == 'axis' and level >= 3):
-                    readVec(line_split, jointAxis, 4, float)
-
-                # Joints (Vert, Bone, Weight)
-                if (line_start == 'weight' and level >= 2):
-                    readWeights(line_split, weights)
-                # progress.step()
+
+            def parent(level, rest):
+                if (level >= 3):
+                    jointParents[len(jointParents) - 1] = rest
+
+            def origin(level, rest):
+                if (level >= 3):
+                    readVec(rest, jointOrigin, 3, float)
+
+            def axis(level, rest):
+                if (level >= 3):
+                    readVec(rest, jointAxis, 4, float)
+
+            # Joints (Vert, Bone, Weight)
+            def weight(level, rests):
+                if (level >= 2):
+                    weights.append(parse_floats(rests, 3, np.float64))
+
+            # Runs of numeric lines are parsed in bulk
+            bulk = {
+                'vert': vert,
+                'uv': uv,
+                'weight': weight,
+            }
+
+            handlers = {
+                'group': group,
+                'count': count,
+                'verts': verts,
+                'uvs': uvs,
+                'smoothGroup': smoothGroup,
+                'joint': joint,
+                'parent': parent,
+                'origin': origin,
+                'axis': axis,
+            }
+
+            progress.enter_substeps(1, "Parse Data")
+            # Read model data
+            signature = parse_data_txt(filepath, handlers, bulk)
             progress.leave_substeps("Parse Data end")
 
+            print('Signature:', signature)
+            if signature != 'HD_DATA_TXT':
+                print("Unrecognized signature: %s" % signature)
+                operator.report({'ERROR'}, "Unrecognized file format")
+                return {'FINISHED'}
+
             for idx, name in enumerate(jointNames):
                 jointNames[idx] = boneRenameBlender(name)
 
@@ -880,47 +824,41 @@ def read_dmesh(operator, context, filepath, file_format):
 
                 # create all Bones
                 progress.enter_substeps(boneCount, "create bones")
+                editBones = []
                 for idx, jointName in enumerate(jointNames):
-                    editBone = armature_ob.data.edit_bones.new(jointName)
-                    editBone.tail = Vector(editBone.head) + Vector((0, 0, 1))
+                    editBones.append(armature_ob.data.edit_bones.new(jointName))
                     progress.step()
                 progress.leave_substeps("create bones end")
 
                 # set all bone parents
                 progress.enter_substeps(boneCount, "parenting bones")
-                for idx, jointParent in enumerate(jointParents):
-                    if (jointParent is not None):
-                        editBone = armature_da.edit_bones[idx]
-                        editBone.parent = armature_da.edit_bones[jointParent]
+                parents = parent_indices(jointNames, jointParents)
+                for idx, parent in enumerate(parents):
+                    if (parent >= 0):
+                        editBones[idx].parent = editBones[parent]
                     progress.step()
                 progress.leave_substeps("parenting bones end")
 
                 # origins of each bone is relative to its parent
                 # recalc all origins
-                progress.enter_substeps(boneCount, "aligning bones")
-                rootBones = [rootBone for rootBone in armature_da.edit_bones if rootBone.parent is None]
-                for rootBone in rootBones:
-                    idx = jointNames.index(rootBone.name)
-                    mat = Quaternion(jointAxis[idx]).to_matrix().to_4x4()
-                    pos = Vector(jointOrigin[idx])
-                    mat.translation = vectorSwapSkel(pos)
-                    rootBone.matrix = SWAP_ROW_SKEL @ mat @ SWAP_COL_SKEL
-                    recurBonesOriginMesh(progress, rootBone, jointNames, jointAxis, jointOrigin)
-                    progress.step()
-                progress.leave_substeps("aligning bones end")
-
+                progress.enter_substeps(1, "aligning bones")
+                isRoot = np.array(parents) < 0
+                pos = np.array(jointOrigin, dtype=np.float64)
+                local = np.zeros((boneCount, 4, 4))
+                local[:, :3, :3] = quaternion_matrices(jointAxis)
+                local[:, 3, 3] = 1
+                local[isRoot, :3, 3] = pos[isRoot][:, (2, 1, 0)] * (-1, 1, -1)
+                local[isRoot] = SWAP_ROW_SKEL @ local[isRoot] @ SWAP_COL_SKEL
+                local[~isRoot] = SWAP_ROW_DMESH_CHILD @ local[~isRoot] @ SWAP_COL_DMESH_CHILD
+                local[~isRoot, :3, 3] = pos[~isRoot][:, (2, 0, 1)] * (-1, 1, 1)
+                world = edit_bone_matrices(world_matrices(parents, local))
+                heads = world[:, :3, 3]
+                rolls = bone_rolls(world, heads, heads + world[:, :3, 1])
                 # lenght of bones
-                for bone in armature_da.edit_bones:
-                    for child in bone.children:
-                        center = child.head
-                        proxVec = center - bone.head
-                        boneVec = bone.tail - bone.head
-                        norm = proxVec.dot(boneVec) / boneVec.dot(boneVec)
-                        if (norm > 0.1):
-                            proyVec = norm * boneVec
-                            dist = (proxVec - proyVec).length
-                            if (dist < 0.001):
-                                bone.tail = center
+                tails = bone_tails(parents, world, np.ones(boneCount))
+
+                set_edit_bones(armature_da, heads, tails, rolls)
+                progress.leave_substeps("aligning bones end")
 
                 bpy.ops.object.mode_set(mode='OBJECT')
                 progress.leave_substeps("Build armature end")
@@ -928,6 +866,22 @@ def read_dmesh(operator, context, filepath, file_format):
             if armature_ob:
                 armature_ob.select_set(state=True)
 
+            # Haydee (x, y, z) to Blender (-x, -z, y)
+            vert_array = np.concatenate(vert_data or [np.empty((0, 3), dtype=np.float32)])
+            vert_array = vert_array[:, (0, 2, 1)] * np.array((-1, -1, 1), dtype=np.float32)
+            uv_array = np.concatenate(uv_data or [np.empty((0, 2), dtype=np.float32)])
+            if (file_format == 'H2'):
+                uv_array[:, 1] = 1 - uv_array[:, 1]
+
+            # Weights (Vert, Bone, Weight), only for bones in the armature
+            weight_array = np.concatenate(weights or [np.empty((0, 3), dtype=np.float64)])
+            # sorted by vert once, file order kept for each vert
+            weight_order = np.argsort(weight_array[:, 0].astype(np.int64), kind='stable')
+            weight_verts = weight_array[weight_order, 0].astype(np.int64)
+            weightGroupNames = []
+            if armature_ob:
+                weightGroupNames = [name if armature_ob.data.bones.get(name) else None for name in jointNames]
+
             # Create mesh (verts and faces)
             progress.enter_substeps(len(meshFaces), "creating meshes")
             for meshName, face_verts in meshFaces.items():
@@ -936,87 +890,43 @@ def read_dmesh(operator, context, filepath, file_format):
                 smoothGroups = meshSmoothGroups[meshName]
 
                 progress.enter_substeps(1, "vertdic")
-                vertDic = []
-                for face in face_verts:
-                    for vertIdx in face:
-                        if vertIdx not in vertDic:
-                            vertDic.append(vertIdx)
+                loop_totals = np.array([len(face) for face in face_verts], dtype=np.int32)
+                vertDic, local_verts = compact_indices([vertIdx for face in face_verts for vertIdx in face])
                 progress.leave_substeps("vertdic end")
 
                 # Obtain mesh exclusive verts and renumerate for faces
                 progress.enter_substeps(1, "local verts")
-                objVerts = [vert_data[oldIdx] for oldIdx in vertDic]
-                objFaces = [tuple(vertDic.index(oldIdx) for oldIdx in face)[::-1] for face in face_verts]
+                objVerts = vert_array[vertDic]
+                # reverse winding of every face
+                face_starts = np.cumsum(loop_totals) - loop_totals
+                reverse = np.repeat(2 * face_starts + loop_totals - 1, loop_totals) - np.arange(len(local_verts))
+                loop_verts = local_verts[reverse]
                 progress.leave_substeps("local verts end")
 
+                # UVs per loop
+                loop_uvs = None
+                loop_uv_idx = np.array([uvIdx for uvs in face_uvs for uvIdx in uvs], dtype=np.int64)
+                if len(loop_uv_idx) == len(loop_verts):
+                    loop_uvs = uv_array[loop_uv_idx[reverse]]
+
                 progress.enter_substeps(1, "mesh data")
-                mesh_data = bpy.data.meshes.new(meshName)
-                mesh_data.from_pydata(list(map(coordTransform, objVerts)), [], objFaces)
-                # Shade smooth
-                mesh_data.use_auto_smooth = True
-                mesh_data.auto_smooth_angle = pi
-                mesh_data.polygons.foreach_set("use_smooth",
-                                               [True] * len(mesh_data.polygons))
+                mesh_data = build_mesh(meshName, objVerts, loop_verts, loop_totals, loop_uvs)
                 progress.leave_substeps("mesh data end")
 
-                # apply UVs
-                progress.enter_substeps(1, "uv")
-                useUvs = True
-                if useUvs and face_uvs is not None:
-                    mesh_data.uv_layers.new()
-                    blen_uvs = mesh_data.uv_layers[-1]
-                    for idx, uvs in enumerate([uv for uvs in face_uvs for uv in uvs[::-1]]):
-                        uv_coord = Vector(uv_data[int(uvs)])
-                        if (file_format=='H2'):
-                            uv_coord = Vector((uv_coord.x, 1-uv_coord.y))
-                        blen_uvs.data[idx].uv = uv_coord
-                progress.leave_substeps("uv end")
-
                 useSmooth = True
-                if useSmooth:
-                    # unique_smooth_groups
-                    unique_smooth_groups = {}
-                    for g in set(smoothGroups):
-                        unique_smooth_groups[g] = None
-
-                    if unique_smooth_groups:
-                        sharp_edges = set()
-                        smooth_group_users = {context_smooth_group: {} for context_smooth_group in unique_smooth_groups.keys()}
-                        context_smooth_group_old = -1
-
+                if useSmooth and len(smoothGroups) == len(loop_totals):
                     # detect if edge is used in faces with different Smoothing Groups
                     progress.enter_substeps(1, "detect smooth")
-                    for idx, face_vert_loc_indices in enumerate(objFaces):
-                        len_face_vert_loc_indices = len(face_vert_loc_indices)
-                        context_smooth_group = smoothGroups[idx]
-                        if unique_smooth_groups and context_smooth_group:
-                            # Is a part of of a smooth group and is a face
-                            if context_smooth_group_old is not context_smooth_group:
-                                edge_dict = smooth_group_users[context_smooth_group]
-                                context_smooth_group_old = context_smooth_group
-                            prev_vidx = face_vert_loc_indices[-1]
-                            for vidx in face_vert_loc_indices:
-                                edge_key = (prev_vidx, vidx) if (prev_vidx < vidx) else (vidx, prev_vidx)
-                                prev_vidx = vidx
-                                edge_dict[edge_key] = edge_dict.get(edge_key, 0) + 1
+                    sharp_keys = sharp_edge_keys(loop_verts, loop_totals, smoothGroups)
                     progress.leave_substeps("detect smooth end")
 
-                    # Build sharp edges
-                    progress.enter_substeps(1, "build sharp")
-                    if unique_smooth_groups:
-                        for edge_dict in smooth_group_users.values():
-                            for key, users in edge_dict.items():
-                                if users == 1:  # This edge is on the boundry of 2 groups
-                                    sharp_edges.add(key)
-                    progress.leave_substeps("build sharp end")
-
                     # Mark sharp edges
                     progress.enter_substeps(1, "mark sharp")
-                    if unique_smooth_groups and sharp_edges:
-                        for e in mesh_data.edges:
-                            if e.key in sharp_edges:
-                                e.use_edge_sharp = True
-                        # mesh_data.show_edge_sharp = True
+                    if len(sharp_keys):
+                        edge_verts = np.empty(len(mesh_data.edges) * 2, dtype=np.int32)
+                        mesh_data.edges.foreach_get("vertices", edge_verts)
+                        edge_keys = edge_key_array(edge_verts.reshape(-1, 2))
+                        mesh_data.edges.foreach_set("use_edge_sharp", np.isin(edge_keys, sharp_keys))
                     progress.leave_substeps("mark sharp end")
 
                 progress.enter_substeps(1, "linking")
@@ -1026,16 +936,12 @@ def read_dmesh(operator, context, filepath, file_format):
 
                 # Assign vertex weights
                 progress.enter_substeps(1, "weights")
-                if weights:
-                    for w in [weight for weight in weights if weight[0] in vertDic]:
-                        boneName = jointNames[w[1]]
-                        armature_da = armature_ob.data
-                        bone = armature_da.bones.get(boneName)
-                        if bone:
-                            vertGroup = mesh_obj.vertex_groups.get(boneName)
-                            if not vertGroup:
-                                vertGroup = mesh_obj.vertex_groups.new(name=boneName)
-                            vertGroup.add([vertDic.index(w[0])], w[2], 'REPLACE')
+                if len(weight_array) and armature_ob:
+                    # weights of the mesh verts, numbered as mesh verts
+                    (positions, mesh_verts) = sorted_matches(weight_verts, vertDic)
+                    rows = weight_order[positions]
+                    add_vertex_weights(mesh_obj, weightGroupNames, mesh_verts,
+                                       weight_array[rows, 1], weight_array[rows, 2])
                 progress.leave_substeps("weights end")
 
                 # parenting
@@ -1084,7 +990,62 @@ class ImportHaydeeDMesh(Operator, ImportHelper):
 # .mesh importer
 # --------------------------------------------------------------------------------
 
-def read_mesh(operator, context, filepath, outfitName, file_format):
+def read_mesh_data(mview, vertex_attributes=False):
+    # Decode a .mesh payload (data after the chunk table).
+    # Returns Blender space verts, uvs, normals, faces (reversed winding)
+    # and when asked a dict of per vertex tangents, bitangents and colors
+    INIT_INFO = 32
+    VERT_SIZE = 60
+    (vertCount, loopCount, x1, y1, z1, x2, y2, z2) = struct.unpack_from('II3f3f', mview)
+
+    # Decode the whole vertex block at once
+    verts = np.frombuffer(mview, dtype=MESH_VERT_DTYPE, count=vertCount, offset=INIT_INFO)
+    # Haydee (x, y, z) to Blender (-x, -z, y)
+    swap = np.array((-1, -1, 1), dtype=np.float32)
+    vert_data = verts['pos'][:, (0, 2, 1)] * swap
+    uv_data = verts['uv'].copy()
+    normals = verts['normal'][:, (0, 2, 1)] * swap
+
+    faceCount = loopCount // 3
+    faces = np.frombuffer(mview, dtype='<u4', count=faceCount * 3,
+                          offset=INIT_INFO + (VERT_SIZE * vertCount)).reshape(-1, 3)
+    # reverse winding
+    face_data = np.ascontiguousarray(faces[:, ::-1])
+
+    attributes = None
+    if vertex_attributes:
+        attributes = {
+            'Tangent': verts['tangent'][:, (0, 2, 1)] * swap,
+            'Bitangent': verts['bitangent'][:, (0, 2, 1)] * swap,
+            'Color': verts['color'] / np.float32(255),
+        }
+    return (vert_data, uv_data, np.ascontiguousarray(normals), face_data, attributes)
+
+
+def add_vertex_attributes(mesh_data, attributes):
+    # One point domain attribute per array, filled with a single foreach_set
+    for name, values in attributes.items():
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        if values.shape[1] == 4:
+            attribute = mesh_data.attributes.new(name, 'FLOAT_COLOR', 'POINT')
+            attribute.data.foreach_set("color", values.reshape(-1))
+        else:
+            attribute = mesh_data.attributes.new(name, 'FLOAT_VECTOR', 'POINT')
+            attribute.data.foreach_set("vector", values.reshape(-1))
+
+
+def mesh_structure_ok(vertCount, face_data):
+    # Cheap replacement for validate(): triangles index existing
+    # verts and no triangle uses the same vert twice
+    if not len(face_data):
+        return True
+    return bool(face_data.max() < vertCount
+                and np.all((face_data[:, 0] != face_data[:, 1])
+                           & (face_data[:, 1] != face_data[:, 2])
+                           & (face_data[:, 2] != face_data[:, 0])))
+
+
+def read_mesh(operator, context, filepath, outfitName, file_format, trusted_source=False, vertex_attributes=False):
     print('Mesh:', filepath)
     with ProgressReport(context.window_manager) as progReport:
         with ProgressReportSubstep(progReport, 4,
@@ -1092,11 +1053,6 @@ def read_mesh(operator, context, filepath, outfitName, file_format):
             if (bpy.context.mode != 'OBJECT'):
                 bpy.ops.object.mode_set(mode='OBJECT')
 
-            SIGNATURE_SIZE = 28
-            CHUNK_SIZE = 48
-            INIT_INFO = 32
-            VERT_SIZE = 60
-            FACE_SIZE = 12
             DEFAULT_MESH_NAME = os.path.splitext(os.path.basename(filepath))[0]
             if outfitName:
                 DEFAULT_MESH_NAME = DEFAULT_MESH_NAME
@@ -1105,93 +1061,42 @@ def read_mesh(operator, context, filepath, outfitName, file_format):
             print("Importing mesh: %s" % filepath)
 
             progress.enter_substeps(1, "Read file")
-            data = None
-            with open(filepath, "rb") as a_file:
-                data = a_file.read()
+            with HdChunkFile(filepath) as chunk:
+                print('Signature:', chunk.signature)
+                if chunk.signature != Signature.HD_CHUNK:
+                    print("Unrecognized signature: [%s]" % binascii.hexlify(chunk.view[0:16]))
+                    operator.report({'ERROR'}, "Unrecognized file format")
+                    return {'FINISHED'}
+                (vert_data, uv_data, normals, face_data, attributes) = \
+                    read_mesh_data(chunk.data, vertex_attributes)
             progress.leave_substeps("Read file end")
 
-            (signature, chunkCount, totalSize) = \
-                struct.unpack('20sII', data[0:SIGNATURE_SIZE])
-            signature = decodeText(signature)
-            print('Signature:', signature)
-            if signature != 'HD_CHUNK':
-                print("Unrecognized signature: %s" % signature)
-                operator.report({'ERROR'}, "Unrecognized file format")
-                return {'FINISHED'}
-
-            offset = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount)
-            (vertCount, loopCount, x1, y1, z1, x2, y2, z2) = \
-                struct.unpack('II3f3f', data[offset:offset + INIT_INFO])
-
-            posTop = Vector((-x1, z1, -y1))
-            posBottom = Vector((-x2, z2, -y2))
-
-            headerSize = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount) + INIT_INFO
-            delta = headerSize
-
-            vert_data = []
-            uv_data = []
-            normals = []
-
-            for n in range(vertCount):
-                offset = delta + (VERT_SIZE * n)
-                (
-                    x, y, z,
-                    u, v,
-                    vcolorR, vcolorG, vcolorB, vcolorA,
-                    normX, normY, normZ,
-                    tanX, tanY, tanZ,
-                    bitanX, bitanY, bitanZ) = \
-                    struct.unpack('3f2f4B9f', data[offset:offset + VERT_SIZE])
-                vert = Vector((-x, -z, y))
-                uv = Vector((u, v))
-                norm = Vector((-normX, -normZ, normY))
-                vert_data.append(vert)
-                uv_data.append(uv)
-                normals.append(norm)
-
-            faceCount = loopCount // 3
-            delta = headerSize + (VERT_SIZE * vertCount)
-            face_data = []
+            faceCount = len(face_data)
             print('faceCount', faceCount)
-            for n in range(faceCount):
-                offset = delta + (FACE_SIZE * n)
-                (v1, v2, v3) = struct.unpack('3I', data[offset:offset + FACE_SIZE])
-                face = [v3, v2, v1]
-                face_data.append(face)
+            loop_verts = face_data.ravel()
+            loop_uvs = uv_data[loop_verts]
+            if (file_format == 'H2'):
+                loop_uvs[:, 1] = 1 - loop_uvs[:, 1]
 
             # Create Mesh
             progress.enter_substeps(1, "mesh data")
-            mesh_data = bpy.data.meshes.new(DEFAULT_MESH_NAME)
-            mesh_data.from_pydata(vert_data, [], face_data)
-            # Shade smooth
-            mesh_data.use_auto_smooth = True
-            mesh_data.auto_smooth_angle = pi
-            mesh_data.polygons.foreach_set("use_smooth",
-                                           [True] * len(mesh_data.polygons))
+            mesh_data = build_mesh(DEFAULT_MESH_NAME, vert_data, loop_verts,
+                                   np.full(faceCount, 3, dtype=np.int32), loop_uvs)
             progress.leave_substeps("mesh data end")
 
-            # apply UVs
-            progress.enter_substeps(1, "uv")
-            useUvs = True
-            if useUvs and uv_data is not None:
-                mesh_data.uv_layers.new()
-                blen_uvs = mesh_data.uv_layers[-1]
-                for loop in mesh_data.loops:
-                    uv_coord = Vector(uv_data[loop.vertex_index])
-                    if (file_format=='H2'):
-                        uv_coord = Vector((uv_coord.x, 1-uv_coord.y))
-                    blen_uvs.data[loop.index].uv = uv_coord
-            progress.leave_substeps("uv end")
-
             # normals
             use_edges = True
             mesh_data.create_normals_split()
-            meshCorrected = mesh_data.validate(clean_customdata=False)  # *Very* important to not remove nors!
-            mesh_data.update(calc_edges=use_edges)
+            if not (trusted_source and mesh_structure_ok(len(vert_data), face_data)):
+                meshCorrected = mesh_data.validate(clean_customdata=False)  # *Very* important to not remove nors!
+                mesh_data.update(calc_edges=use_edges)
             mesh_data.normals_split_custom_set_from_vertices(normals)
             mesh_data.use_auto_smooth = True
 
+            # tangents, bitangents and vertex colors
+            if attributes:
+                add_vertex_attributes(mesh_data, attributes)
+
             mesh_obj = bpy.data.objects.new(mesh_data.name, mesh_data)
             linkToActiveCollection(mesh_obj)
             mesh_obj.select_set(state=True)
@@ -1213,172 +1118,258 @@ class ImportHaydeeMesh(Operator, ImportHelper):
     )
 
     file_format: file_format_prop
+    trusted_source: BoolProperty(
+        name="Trusted source",
+        description="Skip the full mesh validation for files exported by the game (only a quick structure check is done)",
+        default=False,
+    )
+    vertex_attributes: BoolProperty(
+        name="Tangents and vertex colors",
+        description="Keep the tangents, bitangents and vertex colors of the file as mesh attributes",
+        default=False,
+    )
 
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        return read_mesh(self, context, self.filepath, None, self.file_format)
+        return read_mesh(self, context, self.filepath, None, self.file_format,
+                         self.trusted_source, self.vertex_attributes)
 
 
 # --------------------------------------------------------------------------------
 # .motion importer
 # --------------------------------------------------------------------------------
 
+# Motion import options
+frame_start_prop = IntProperty(
+    name="Start Frame",
+    description="First frame of the motion to import",
+    min=1,
+    default=1,
+)
+frame_end_prop = IntProperty(
+    name="End Frame",
+    description="Last frame of the motion to import (0 for the last frame of the file)",
+    min=0,
+    default=0,
+)
+frame_step_prop = IntProperty(
+    name="Frame Step",
+    description="Import every Nth frame",
+    min=1,
+    default=1,
+)
+bone_list_prop = StringProperty(
+    name="Bones",
+    description="Comma separated names of the bones to import (empty for all bones)",
+    default="",
+)
+set_frame_range_prop = BoolProperty(
+    name="Set Frame Range",
+    description="Set the scene frame range to the imported frames",
+    default=True,
+)
+reduce_keys_prop = BoolProperty(
+    name="Reduce Keys",
+    description="Remove keys that linear interpolation of the remaining keys reproduces within the tolerances",
+    default=False,
+)
+location_tolerance_prop = FloatProperty(
+    name="Location Tolerance",
+    description="Largest location error allowed by key reduction",
+    min=0,
+    default=0.001,
+    precision=4,
+    subtype='DISTANCE',
+)
+rotation_tolerance_prop = FloatProperty(
+    name="Rotation Tolerance",
+    description="Largest rotation error allowed by key reduction",
+    min=0,
+    default=pi / 1800,
+    subtype='ANGLE',
+)
+
+
 # Helper for commong logic
-def read_motion_bones(memData, boneCount, numFrames, TRACK_SIZE, KEY_SIZE, TRACK_OFFSET, KEY_OFFSET):
-    unpack_bone = struct.Struct('<32sI').unpack
-    unpack_key = struct.Struct('3f4f').unpack
-    bones, boneNames = dict(), []
-    for n in range(boneCount):
-        offset = TRACK_OFFSET + (TRACK_SIZE * n)
-        (name, firstKey) = unpack_bone(memData[offset:offset + TRACK_SIZE])
-        name = boneRenameBlender(readStrA_term(0, 32, memoryview(name))[0])
-        keys = []
-        for k in range(firstKey, firstKey + numFrames):
-            offset = KEY_OFFSET + (KEY_SIZE * k)
-            (x, y, z, qx, qz, qy, qw) = unpack_key(memData[offset:offset + KEY_SIZE])
-            keys.append((x, y, z, qx, qz, qy, qw))
-        bones[name] = keys
-        boneNames.append(name)
-    return (boneNames, bones)
-
-
-
-def read_motion(operator, context, filepath):
+def read_motion_bones(memData, boneCount, numFrames, TRACK_SIZE, KEY_SIZE, TRACK_OFFSET, KEY_OFFSET,
+                      frames=None, boneFilter=None):
+    # Returns the bone names and a (bones, frames, 7) array of keys.
+    # Only the keys of the requested frames (0 based) and bones are read
+    trackDtype = np.dtype({'names': ['name', 'firstKey'], 'formats': ['S32', '<u4'],
+                           'offsets': [0, 32], 'itemsize': TRACK_SIZE})
+    keyDtype = np.dtype({'names': ['key'], 'formats': [('<f4', 7)], 'offsets': [0], 'itemsize': KEY_SIZE})
+    tracks = np.frombuffer(memData, dtype=trackDtype, count=boneCount, offset=TRACK_OFFSET)
+    boneNames = [boneRenameBlender(decodeText(name)) for name in tracks['name']]
+    if boneFilter is not None:
+        used = [idx for idx, name in enumerate(boneNames) if name in boneFilter]
+        tracks = tracks[used]
+        boneNames = [boneNames[idx] for idx in used]
+    if frames is None:
+        frames = np.arange(numFrames)
+    if not (len(tracks) and len(frames)):
+        return (boneNames, np.empty((len(tracks), len(frames), 7), dtype=np.float32))
+    # Each track is numFrames consecutive keys starting at firstKey
+    keyIdx = tracks['firstKey'].astype(np.int64)[:, None] + frames
+    keyTable = np.frombuffer(memData, dtype=keyDtype, count=int(keyIdx.max()) + 1, offset=KEY_OFFSET)
+    return (boneNames, keyTable['key'][keyIdx])
+
+
+# Value of 'LINEAR' in the keyframe interpolation enum
+LINEAR_INTERPOLATION = 1
+
+
+def motion_action(armature, name):
+    # Action of the armature, created when missing
+    armature.animation_data_create()
+    if not armature.animation_data.action:
+        armature.animation_data.action = bpy.data.actions.new(name)
+    return armature.animation_data.action
+
+
+def add_fcurve_keys(action, data_path, group, frames, values, keep=None):
+    # One F-curve per channel, replaced if it exists and
+    # filled with a single foreach_set.
+    # keep is a (frames, channels) mask of reduced keys, those
+    # curves are interpolated linearly like the reduction assumes
+    co = np.empty((len(frames), 2), dtype=np.float32)
+    co[:, 0] = frames
+    for index in range(values.shape[1]):
+        fcurve = action.fcurves.find(data_path, index=index)
+        if fcurve:
+            action.fcurves.remove(fcurve)
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+        co[:, 1] = values[:, index]
+        channel = co if keep is None else co[keep[:, index]]
+        fcurve.keyframe_points.add(len(channel))
+        fcurve.keyframe_points.foreach_set("co", channel.reshape(-1))
+        if keep is not None:
+            fcurve.keyframe_points.foreach_set("interpolation", [LINEAR_INTERPOLATION] * len(channel))
+        fcurve.update()
+
+
+def key_motion(armature, action, boneNames, keys, root_matrices, frames, tolerance=None):
+    # Key location and rotation of the bones for all frames at once.
+    # keys is a (bones, frames, 7) array, root_matrices turns the keys
+    # of root bones into armature space matrices.
+    # tolerance (location, rotation in radians) reduces the keys
+    bones = armature.data.bones
+    used = []
+    for idx, name in enumerate(boneNames):
+        if name in bones:
+            used.append(idx)
+        else:
+            print("WARNING: Bone named " + name + " not found in armature")
+    if not used:
+        return
+    names = [boneNames[idx] for idx in used]
+    keys = keys[used]
+    identity = Matrix.Identity(4)
+    rest = np.array([bones[name].matrix_local for name in names])
+    parentRest = np.array([bones[name].parent.matrix_local if bones[name].parent else identity for name in names])
+    isRoot = np.array([bones[name].parent is None for name in names])
+
+    targets = key_matrices(keys)
+    targets[isRoot] = root_matrices(keys[isRoot])
+    (locs, quats) = pose_channels(targets, rest, parentRest)
+
+    # rotation in the channel of the bone rotation mode
+    poses = [armature.pose.bones[name] for name in names]
+    rotations = []
+    for idx, pose in enumerate(poses):
+        if pose.rotation_mode == 'QUATERNION':
+            rotations.append(('rotation_quaternion', quats[idx]))
+        elif pose.rotation_mode == 'AXIS_ANGLE':
+            rotations.append(('rotation_axis_angle', quaternion_axis_angles(quats[idx])))
+        else:
+            eulers = matrix_eulers(quaternion_matrices(quats[idx]), pose.rotation_mode)
+            rotations.append(('rotation_euler', eulers))
+
+    locKeep = [None] * len(names)
+    rotKeep = [None] * len(names)
+    if tolerance:
+        (locTolerance, rotTolerance) = tolerance
+        # all channels of all bones in one pass, frames first
+        locKeep = reduce_keys(locs.transpose(1, 0, 2).reshape(len(frames), -1), locTolerance)
+        locKeep = locKeep.reshape(len(frames), len(names), 3).transpose(1, 0, 2)
+        rotTolerances = []
+        for (prop, values) in rotations:
+            if prop == 'rotation_quaternion':
+                # a quaternion component error e turns the bone by at most about 4e
+                rotTolerances.append(np.full(4, rotTolerance / 4))
+            elif prop == 'rotation_axis_angle':
+                # an axis component error e turns the bone by at most about 2 * sqrt(3) * e
+                rotTolerances.append((rotTolerance / 2,) + (rotTolerance / (4 * np.sqrt(3)),) * 3)
+            else:
+                # the errors of the three angles add up
+                rotTolerances.append(np.full(3, rotTolerance / 3))
+        rotKeep = reduce_keys(np.concatenate([values for (prop, values) in rotations], axis=1),
+                              np.concatenate(rotTolerances))
+        splits = np.cumsum([values.shape[1] for (prop, values) in rotations])[:-1]
+        rotKeep = np.split(rotKeep, splits, axis=1)
+
+    for idx, pose in enumerate(poses):
+        (prop, values) = rotations[idx]
+        add_fcurve_keys(action, pose.path_from_id('location'), pose.name, frames, locs[idx], locKeep[idx])
+        add_fcurve_keys(action, pose.path_from_id(prop), pose.name, frames, values, rotKeep[idx])
+
+
+def read_motion(operator, context, filepath, frameStart=1, frameEnd=0, frameStep=1, boneList='', setFrameRange=True,
+                tolerance=None):
     armature = find_armature(operator, context)
     if not armature:
         return {'FINISHED'}
 
-    with open(filepath, "rb") as a_file:
-        data = a_file.read()
-    mview = memoryview(data)
-
-    (entries, serialSize, assType) = struct.unpack('<ii6s', mview[20:34])
-    assType, sig = assType.decode("latin"), sig_check(mview)
-    propMap, numFrames = None, None
-    unpack_int = struct.Struct('<i').unpack
-    unpack_entry = struct.Struct('<32siiii').unpack
-
-    if (sig == Signature.HD_CHUNK and assType == 'motion'):
-        print('Signature:', Signature.HD_CHUNK.name)
-        propMap = dict(numFrames={'reader': lambda x: unpack_int(x)[0]},
-                       duration= {'reader': lambda x: unpack_int(x)[0]},
-                       numKeys=  {'reader': lambda x: unpack_int(x)[0]},
-                       numTracks={'reader': lambda x: unpack_int(x)[0]},
-                       numEvents={'reader': lambda x: unpack_int(x)[0]},
-                       keys=     {'reader': lambda x: True},
-                       tracks=   {'reader': lambda x: True},
-                       events=   {'reader': lambda x: False})
-
-        dataOffset = 28 + (entries * 48)
-
-        for x in range(1, entries):
-            sPos = 28 + (x * 48)
-            (name, size, offset, numSubs, subs) = unpack_entry(mview[sPos:sPos+48])
-            name = readStrA_term(0, 32, memoryview(name))[0]
-            propMap[name].update(dict(zip(['size', 'offset', 'numSubs', 'subs', 'hasValue'],[size, offset, numSubs, subs, size > 0])))
-
-        for key, value in propMap.items():
-            if (value.get("hasValue")):
-                (f, lSize, lOff) = (value['reader'], value['size'], value['offset'])
-                lOff = dataOffset + lOff
-                value["value"] = f(mview[lOff:lOff+lSize])
-
-        numFrames = propMap['numFrames']['value']
-        boneCount = propMap['numTracks']['value']
-        trackSize = int(propMap['tracks']['size'] / boneCount)
-        keySize = int(propMap['keys']['size'] / propMap['numKeys']['value'])
-        trackOffset = 28 + (entries * 48) + int(propMap['tracks']['offset'])
-        keyOffset = 28 + (entries * 48) + int(propMap['keys']['offset'])
-        (boneNames, bones) = read_motion_bones(mview, boneCount, numFrames, trackSize, keySize, trackOffset, keyOffset)
-
-    elif (sig == Signature.HD_MOTION):
-        print('Signature:', Signature.HD_MOTION.name)
-        KEY_SIZE = 28
-        TRACK_SIZE = 36
-
-        (keyCount, boneCount, firstFrame, duration, numFrames, dataSize) = struct.unpack('6I', data[20:44])
-        keyOffset = 44
-        trackOffset = 44 + int(KEY_SIZE * keyCount)
-        (boneNames, bones) = read_motion_bones(mview, boneCount, numFrames, TRACK_SIZE, KEY_SIZE, trackOffset, keyOffset)
-
-    else:
-        print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(mview[0:16]), assType))
-        operator.report({'ERROR'}, "Unrecognized file format")
-        return {'FINISHED'}
+    with HdChunkFile(filepath) as chunk:
+        sig, assType = chunk.signature, chunk.asset_type
+
+        if (sig == Signature.HD_CHUNK and assType == 'motion'):
+            print('Signature:', Signature.HD_CHUNK.name)
+            numFrames = chunk.read_int('numFrames')
+            boneCount = chunk.read_int('numTracks')
+            tracks, keys = chunk.get('tracks'), chunk.get('keys')
+            trackSize = len(tracks) // boneCount
+            keySize = len(keys) // chunk.read_int('numKeys')
+            frames = frame_selection(numFrames, frameStart, frameEnd, frameStep)
+            (boneNames, keys) = read_motion_bones(chunk.data, boneCount, numFrames, trackSize, keySize,
+                                                  chunk.entries['tracks'][1], chunk.entries['keys'][1],
+                                                  frames - 1, bone_selection(boneList))
+
+        elif (sig == Signature.HD_MOTION):
+            print('Signature:', Signature.HD_MOTION.name)
+            KEY_SIZE = 28
+            TRACK_SIZE = 36
+
+            (keyCount, boneCount, firstFrame, duration, numFrames, dataSize) = struct.unpack('6I', chunk.view[20:44])
+            keyOffset = 44
+            trackOffset = 44 + int(KEY_SIZE * keyCount)
+            frames = frame_selection(numFrames, frameStart, frameEnd, frameStep)
+            (boneNames, keys) = read_motion_bones(chunk.view, boneCount, numFrames, TRACK_SIZE, KEY_SIZE, trackOffset, keyOffset,
+                                                  frames - 1, bone_selection(boneList))
 
-    boneNames.reverse()
+        else:
+            print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(chunk.view[0:16]), assType))
+            operator.report({'ERROR'}, "Unrecognized file format")
+            return {'FINISHED'}
 
-    bpy.ops.object.mode_set(mode='OBJECT')
+    if (bpy.context.mode != 'OBJECT'):
+        bpy.ops.object.mode_set(mode='OBJECT')
     bpy.ops.object.select_all(action='DESELECT')
-    # armature.hide = False
     armature.select_set(state=True)
     bpy.context.view_layer.objects.active = armature
-    bpy.ops.object.mode_set(mode='POSE')
 
-    wm = bpy.context.window_manager
-    wm.progress_begin(0, numFrames)
-
-    r = Quaternion([0, 0, 1], pi / 2).to_matrix().to_4x4()
-
-    context.scene.frame_start = 1
-    context.scene.frame_end = numFrames
-    for pose in context.selected_pose_bones:
-        pose.bone.select = False
-    for frame in range(1, numFrames + 1):
-        wm.progress_update(frame - 1)
-        context.scene.frame_set(frame)
-        for name in boneNames:
-            bone_name = name
-            if not (bone_name in armature.data.bones):
-                print("WARNING: Bone named " + bone_name + " not found in armature")
-                continue
-
-            bone = armature.data.bones[bone_name]
-            pose = armature.pose.bones[bone_name]
-            if not bone:
-                continue
-            bone.select = True
-
-            (x, y, z, qx, qz, qy, qw) = bones[bone_name][frame - 1]
-
-            origin = Vector([-z, x, y])
-            q = Quaternion([qw, -qy, qx, qz])
-            m = q.to_matrix().to_4x4()
-            m.translation = origin
-
-            if bone.parent:
-                m = pose.parent.matrix @ m
-
-            pose.matrix = m
-
-        # Rotate bone not in 'SK_Root' chain
-        rootBones = [rootBone for rootBone in armature.pose.bones if rootBone.parent is None]
-        for poseBone in rootBones:
-            bone_name = poseBone.name
-            data = bones.get(bone_name)
-            if data:
-                (x, y, z, qx, qz, qy, qw) = bones[bone_name][frame - 1]
-                origin = Vector([-z, x, y])
-                q = Quaternion([qw, -qy, qx, qz])
-                m = q.to_matrix().to_4x4()
-                m.translation = origin
-                poseBone.matrix = r @ m
-
-        bpy.ops.anim.keyframe_insert(type='Rotation', confirm_success=False)
-        bpy.ops.anim.keyframe_insert(type='Location', confirm_success=False)
-        for name, keys in bones.items():
-            if not (bone_name in armature.data.bones):
-                continue
-            bone = armature.data.bones[bone_name]
-            if not bone:
-                continue
-            bone.select = False
+    if not len(frames):
+        operator.report({'WARNING'}, "No frames in the selected range")
+        return {'FINISHED'}
 
-    bpy.ops.object.mode_set(mode='OBJECT')
-    wm.progress_end()
+    if setFrameRange:
+        context.scene.frame_start = frames[0]
+        context.scene.frame_end = frames[-1]
+    action = motion_action(armature, os.path.splitext(os.path.basename(filepath))[0])
+    # Root bones are rotated 90 degrees around Z
+    key_motion(armature, action, boneNames, keys, motion_root_matrices, frames, tolerance)
     return {'FINISHED'}
 
 
@@ -1394,15 +1385,27 @@ class ImportHaydeeMotion(Operator, ImportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
 
+    frame_start: frame_start_prop
+    frame_end: frame_end_prop
+    frame_step: frame_step_prop
+    bone_list: bone_list_prop
+    set_frame_range: set_frame_range_prop
+    reduce_keys: reduce_keys_prop
+    location_tolerance: location_tolerance_prop
+    rotation_tolerance: rotation_tolerance_prop
+
     def execute(self, context):
-        return read_motion(self, context, self.filepath)
+        tolerance = (self.location_tolerance, self.rotation_tolerance) if self.reduce_keys else None
+        return read_motion(self, context, self.filepath, self.frame_start, self.frame_end,
+                           self.frame_step, self.bone_list, self.set_frame_range, tolerance)
 
 
 # --------------------------------------------------------------------------------
 # .dmot importer
 # --------------------------------------------------------------------------------
 
-def read_dmotion(operator, context, filepath):
+def read_dmotion(operator, context, filepath, frameStart=1, frameEnd=0, frameStep=1, boneList='', setFrameRange=True,
+                 tolerance=None):
     armature = find_armature(operator, context)
     if not armature:
         return {'FINISHED'}
@@ -1416,17 +1419,49 @@ def read_dmotion(operator, context, filepath):
             bpy.ops.object.select_all(action='DESELECT')
             print("Importing dpose: %s" % filepath)
 
-            progress.enter_substeps(1, "Read file")
-            data = None
-            encoding = "utf-8-sig"
-            with open(filepath, "r", encoding=encoding) as a_file:
-                data = io.StringIO(a_file.read())
-            progress.leave_substeps("Read file end")
+            bones = {}
+            boneFilter = bone_selection(boneList)
+            # info
+            info = {'numTracks': None, 'numFrames': None, 'frameRate': None}
+            current = {'track': None, 'frame': 0}
+
+            def value(name):
+                def handler(level, rest):
+                    if (level >= 1):
+                        info[name] = int(rest.split()[0])
+                return handler
+
+            def track_start(level, rest):
+                if (level >= 1):
+                    boneName = boneRenameBlender(rest.split()[0])
+                    current['track'] = None
+                    current['frame'] = 0
+                    if boneFilter is None or boneName in boneFilter:
+                        current['track'] = bones[boneName] = []
+
+            # motion, keys outside the frame selection are skipped unparsed
+            def key(level, rest):
+                if (level >= 2 and current['track'] is not None):
+                    frame = current['frame']
+                    current['frame'] = frame + 1
+                    if (frame < frameStart - 1 or (frameEnd > 0 and frame >= frameEnd)
+                            or (frame - frameStart + 1) % frameStep):
+                        return
+                    posX, posY, posZ, quatX, quatZ, quatY, quatW = map(float, rest.split()[0:7])
+                    current['track'].append((posX, posY, posZ, quatX, quatZ, quatY, quatW))
+
+            handlers = {
+                'numTracks': value('numTracks'),
+                'numFrames': value('numFrames'),
+                'frameRate': value('frameRate'),
+                'track': track_start,
+                'key': key,
+            }
 
-            line = stripLine(data.readline())
-            line_split = line.split()
-            line_start = line_split[0]
-            signature = line_start
+            progress.enter_substeps(1, "Parse Data")
+            # Read model data
+            signature = parse_data_txt(filepath, handlers)
+            progress.leave_substeps("Parse Data end")
 
             print('Signature:', signature)
             if signature != 'HD_DATA_TXT':
@@ -1434,111 +1469,26 @@ def read_dmotion(operator, context, filepath):
                 operator.report({'ERROR'}, "Unrecognized file format")
                 return {'FINISHED'}
 
-            contextName = None
-            bones = {}
-            level = 0
-            numTracks = None
-            numFrames = None
-            frameRate = None
-            track = None
-            boneName = None
-
-            # steps = len(data.getvalue().splitlines()) - 1
-            progress.enter_substeps(1, "Parse Data")
-            # Read model data
-            for lineData in data:
-                line = stripLine(lineData)
-                line_split = line.split()
-                line_start = None
-                i = len(line_split)
-                if (i == 0):
-                    continue
-                line_start = line_split[0]
-                if (line_start in ('{')):
-                    level += 1
-                if (line_start in ('}')):
-                    level -= 1
-                    contextName = None
-
-                # info
-                if (level >= 1):
-                    if (line_start == 'numTracks'):
-                        numTracks = int(line_split[1])
-                    if (line_start == 'numFrames'):
-                        numFrames = int(line_split[1])
-                    if (line_start == 'frameRate'):
-                        frameRate = int(line_split[1])
-                    if (line_start == 'track'):
-                        boneName = boneRenameBlender(line_split[1])
-                        bones[boneName] = []
-
-                # motion
-                if (level >= 2):
-                    if (line_start == 'key'):
-                        posX, posY, posZ, quatX, quatZ, quatY, quatW = map(float, line_split[1:8])
-                        bonePose = (posX, posY, posZ, quatX, quatZ, quatY, quatW)
-                        frame = len(bones[boneName])
-                        bones[boneName].append(bonePose)
+            frames = frame_selection(info['numFrames'], frameStart, frameEnd, frameStep)
+            if not len(frames):
+                operator.report({'WARNING'}, "No frames in the selected range")
+                return {'FINISHED'}
 
-            bpy.ops.object.mode_set(mode='OBJECT')
+            boneNames = list(bones.keys())
+            keys = np.array([bones[name][:len(frames)] for name in boneNames],
+                            dtype=np.float64).reshape(len(boneNames), len(frames), 7)
+
+            if (bpy.context.mode != 'OBJECT'):
+                bpy.ops.object.mode_set(mode='OBJECT')
             bpy.ops.object.select_all(action='DESELECT')
-            # armature.hide = False
             armature.select_set(state=True)
             bpy.context.view_layer.objects.active = armature
-            bpy.ops.object.mode_set(mode='POSE')
-
-            wm = bpy.context.window_manager
-            wm.progress_begin(0, numFrames)
-
-            r = Quaternion([0, 0, 1], pi / 2).to_matrix().to_4x4()
-
-            context.scene.frame_start = 1
-            context.scene.frame_end = numFrames
-            for pose in context.selected_pose_bones:
-                pose.bone.select = False
-            for frame in range(1, numFrames + 1):
-                wm.progress_update(frame - 1)
-                context.scene.frame_set(frame)
-                for name in bones.keys():
-                    bone_name = name
-                    if not (bone_name in armature.data.bones):
-                        print("WARNING: Bone named " + bone_name + " not found in armature")
-                        continue
-
-                    bone = armature.data.bones[bone_name]
-                    pose = armature.pose.bones[bone_name]
-                    if not bone:
-                        continue
-                    bone.select = True
-
-                    (x, y, z, qx, qz, qy, qw) = bones[bone_name][frame - 1]
-
-                    origin = Vector([-z, x, y])
-                    q = Quaternion([qw, -qy, qx, qz])
-                    m = q.to_matrix().to_4x4()
-                    m.translation = origin
 
-                    if bone.parent:
-                        m = pose.parent.matrix @ m
-                    else:
-                        origin = Vector([-x, -z, y])
-                        m.translation = origin
-                        m = m @ r
-
-                    pose.matrix = m
-
-                bpy.ops.anim.keyframe_insert(type='Rotation', confirm_success=False)
-                bpy.ops.anim.keyframe_insert(type='Location', confirm_success=False)
-                for name, keys in bones.items():
-                    if not (bone_name in armature.data.bones):
-                        continue
-                    bone = armature.data.bones[bone_name]
-                    if not bone:
-                        continue
-                    bone.select = False
-
-            bpy.ops.object.mode_set(mode='OBJECT')
-            wm.progress_end()
+            if setFrameRange:
+                context.scene.frame_start = frames[0]
+                context.scene.frame_end = frames[-1]
+            action = motion_action(armature, os.path.splitext(os.path.basename(filepath))[0])
+            key_motion(armature, action, boneNames, keys, dmot_root_matrices, frames, tolerance)
     return {'FINISHED'}
 
 
@@ -1554,8 +1504,19 @@ class ImportHaydeeDMotion(Operator, ImportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
 
+    frame_start: frame_start_prop
+    frame_end: frame_end_prop
+    frame_step: frame_step_prop
+    bone_list: bone_list_prop
+    set_frame_range: set_frame_range_prop
+    reduce_keys: reduce_keys_prop
+    location_tolerance: location_tolerance_prop
+    rotation_tolerance: rotation_tolerance_prop
+
     def execute(self, context):
-        return read_dmotion(self, context, self.filepath)
+        tolerance = (self.location_tolerance, self.rotation_tolerance) if self.reduce_keys else None
+        return read_dmotion(self, context, self.filepath, self.frame_start, self.frame_end,
+                            self.frame_step, self.bone_list, self.set_frame_range, tolerance)
 
 
 # --------------------------------------------------------------------------------
@@ -1568,36 +1529,28 @@ def read_pose(operator, context, filepath):
     if not armature:
         return {'FINISHED'}
 
-    with open(filepath, "rb") as a_file:
-        data = a_file.read()
-
-    SIGNATURE_SIZE = 28
-    CHUNK_SIZE = 48
     SIZE2 = 60
 
-    (signature, chunkCount, totalSize) = struct.unpack('20sII', data[0:SIGNATURE_SIZE])
-    signature = decodeText(signature)
-    print("Signature:", signature)
-    if signature != 'HD_CHUNK':
-        print("Unrecognized signature: %s" % signature)
-        operator.report({'ERROR'}, "Unrecognized file format")
-        return {'FINISHED'}
-
-    offset = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount)
-    boneCount = struct.unpack('I', data[offset:offset + 4])
-    boneCount = boneCount[0]
-
     bones = {}
     boneNames = []
-    delta = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount) + 4
-    for n in range(boneCount):
-        offset = delta + (SIZE2 * n)
-        (x, y, z, qx, qz, qy, qw, name) = struct.unpack('3f4f32s', data[offset:offset + SIZE2])
-        bonePose = (x, y, z, qx, qz, qy, qw)
-        name = decodeText(name)
-        name = boneRenameBlender(name)
-        bones[name] = bonePose
-        boneNames.append(name)
+    with HdChunkFile(filepath) as chunk:
+        print("Signature:", chunk.signature)
+        if chunk.signature != Signature.HD_CHUNK:
+            print("Unrecognized signature: [%s]" % binascii.hexlify(chunk.view[0:16]))
+            operator.report({'ERROR'}, "Unrecognized file format")
+            return {'FINISHED'}
+
+        data = chunk.data
+        boneCount = struct.unpack_from('I', data)[0]
+        unpack_pose = struct.Struct('3f4f32s').unpack_from
+        for n in range(boneCount):
+            (x, y, z, qx, qz, qy, qw, name) = unpack_pose(data, 4 + (SIZE2 * n))
+            bonePose = (x, y, z, qx, qz, qy, qw)
+            name = decodeText(name)
+            name = boneRenameBlender(name)
+            bones[name] = bonePose
+            boneNames.append(name)
+        del data
 
     bpy.ops.object.mode_set(mode='OBJECT')
     bpy.ops.object.select_all(action='DESELECT')
@@ -1679,17 +1632,31 @@ def read_dpose(operator, context, filepath):
             bpy.ops.object.select_all(action='DESELECT')
             print("Importing dpose: %s" % filepath)
 
-            progress.enter_substeps(1, "Read file")
-            data = None
-            encoding = "utf-8-sig"
-            with open(filepath, "r", encoding=encoding) as a_file:
-                data = io.StringIO(a_file.read())
-            progress.leave_substeps("Read file end")
+            bones = {}
+            info = {'numTransforms': None}
 
-            line = stripLine(data.readline())
-            line_split = line.split()
-            line_start = line_split[0]
-            signature = line_start
+            # Transforms
+            def numTransforms(level, rest):
+                if (level >= 1):
+                    info['numTransforms'] = int(rest.split()[0])
+
+            def transform(level, rest):
+                if (level >= 1):
+                    line_split = rest.split()
+                    boneName = boneRenameBlender(line_split[0])
+                    posX, posY, posZ, quatX, quatZ, quatY, quatW = map(float, line_split[1:8])
+                    bonePose = (posX, posY, posZ, -quatX, -quatZ, -quatY, -quatW)
+                    bones[boneName] = bonePose
+
+            handlers = {
+                'numTransforms': numTransforms,
+                'transform': transform,
+            }
+
+            progress.enter_substeps(1, "Parse Data")
+            # Read model data
+            signature = parse_data_txt(filepath, handlers)
+            progress.leave_substeps("Parse Data end")
 
             print('Signature:', signature)
             if signature != 'HD_DATA_TXT':
@@ -1697,38 +1664,7 @@ def read_dpose(operator, context, filepath):
                 operator.report({'ERROR'}, "Unrecognized file format")
                 return {'FINISHED'}
 
-            contextName = None
-            bones = {}
-            transformsCount = None
-            level = 0
-
-            # steps = len(data.getvalue().splitlines()) - 1
-            progress.enter_substeps(1, "Parse Data")
-            # Read model data
-            for lineData in data:
-                line = stripLine(lineData)
-                line_split = line.split()
-                line_start = None
-                i = len(line_split)
-                if (i == 0):
-                    continue
-                line_start = line_split[0]
-                if (line_start in ('{')):
-                    level += 1
-                if (line_start in ('}')):
-                    level -= 1
-                    contextName = None
-
-                # Transforms
-                if (line_start == 'numTransforms' and level >= 1):
-                    transformsCount = int(line_split[1])
-
-                # Transforms
-                if (line_start == 'transform' and level >= 1):
-                    boneName = boneRenameBlender(line_split[1])
-                    posX, posY, posZ, quatX, quatZ, quatY, quatW = map(float, line_split[2:9])
-                    bonePose = (posX, posY, posZ, -quatX, -quatZ, -quatY, -quatW)
-                    bones[boneName] = bonePose
+            transformsCount = info['numTransforms']
 
             bpy.ops.object.mode_set(mode='OBJECT')
             bpy.ops.object.select_all(action='DESELECT')
@@ -1797,20 +1733,51 @@ class ImportHaydeeDPose(Operator, ImportHelper):
 # --------------------------------------------------------------------------------
 
 # profile
-def read_outfit(operator, context, filepath, file_format):
+def read_outfit(operator, context, filepath, file_format, trusted_source=False):
     print('Outfit:', filepath)
     with ProgressReport(context.window_manager) as progReport:
         with ProgressReportSubstep(progReport, 4, "Importing outfit", "Finish Importing outfit") as progress:
 
-            data = None
-            encoding = "utf-8-sig"
-            with open(filepath, "r", encoding=encoding, errors="surrogateescape") as a_file:
-                data = io.StringIO(a_file.read())
+            info = {'outfitName': None}
+
+            meshFiles = []
+            skinFiles = []
+            materialFiles = []
+
+            def outfit(level, rest):
+                if (level == 0 and rest):
+                    info['outfitName'] = rest.replace('"', '')
+
+            def name(level, rest):
+                if (level == 1):
+                    info['outfitName'] = rest.replace('"', '')
+
+            def mesh(level, rest):
+                if (level == 2):
+                    meshFiles.append(rest.replace('"', ''))
+                    skinFiles.append(None)
+                    materialFiles.append(None)
+
+            def skin(level, rest):
+                if (level == 2):
+                    skinFiles[len(meshFiles) - 1] = rest.replace('"', '')
+
+            def material(level, rest):
+                if (level == 2):
+                    materialFiles[len(meshFiles) - 1] = rest.replace('"', '')
 
-            line = stripLine(data.readline())
-            line_split = line.split()
-            line_start = line_split[0]
-            signature = line_start
+            handlers = {
+                'outfit': outfit,
+                'name': name,
+                'mesh': mesh,
+                'skin': skin,
+                'material': material,
+            }
+
+            progress.enter_substeps(1, "Parse Data")
+            # Read model data
+            signature = parse_data_txt(filepath, handlers, errors="surrogateescape")
+            progress.leave_substeps("Parse Data end")
 
             print('Signature:', signature)
             if signature != 'HD_DATA_TXT':
@@ -1818,45 +1785,7 @@ def read_outfit(operator, context, filepath, file_format):
                 operator.report({'ERROR'}, "Unrecognized file format")
                 return {'FINISHED'}
 
-            level = 0
-            outfitName = None
-
-            meshFiles = []
-            skinFiles = []
-            materialFiles = []
-
-            # steps = len(data.getvalue().splitlines()) - 1
-            progress.enter_substeps(1, "Parse Data")
-            # Read model data
-            for lineData in data:
-                line = stripLine(lineData)
-                line_split = line.split(maxsplit=1)
-                line_start = None
-                i = len(line_split)
-                if (i == 0):
-                    continue
-                line_start = line_split[0]
-                if (line_start in ('{')):
-                    level += 1
-                if (line_start in ('}')):
-                    level -= 1
-                    contextName = None
-
-                if (line_start == 'outfit' and level == 0 and len(line_split) > 1):
-                    outfitName = line_split[1].replace('"', '')
-
-                # Joints
-                if (line_start == 'name' and level == 1):
-                    outfitName = line_split[1].replace('"', '')
-
-                if (line_start == 'mesh' and level == 2):
-                    meshFiles.append(line_split[1].replace('"', ''))
-                    skinFiles.append(None)
-                    materialFiles.append(None)
-                if (line_start == 'skin' and level == 2):
-                    skinFiles[len(meshFiles) - 1] = line_split[1].replace('"', '')
-                if (line_start == 'material' and level == 2):
-                    materialFiles[len(meshFiles) - 1] = line_split[1].replace('"', '')
+            outfitName = info['outfitName']
 
             combo = []
             for idx in range(len(meshFiles)):
@@ -1886,7 +1815,7 @@ def read_outfit(operator, context, filepath, file_format):
 
                 # Create Mesh
                 if meshpath and os.path.exists(meshpath):
-                    read_mesh(operator, context, meshpath, outfitName, file_format)
+                    read_mesh(operator, context, meshpath, outfitName, file_format, trusted_source)
                     imported_meshes.append(bpy.context.view_layer.objects.active)
                 else:
                     filename = os.path.splitext(os.path.basename(meshpath))[0]
@@ -1934,9 +1863,14 @@ class ImportHaydeeOutfit(Operator, ImportHelper):
     )
 
     file_format: file_format_prop
+    trusted_source: BoolProperty(
+        name="Trusted source",
+        description="Skip the full mesh validation for files exported by the game (only a quick structure check is done)",
+        default=False,
+    )
 
     def execute(self, context):
-        return read_outfit(self, context, self.filepath, self.file_format)
+        return read_outfit(self, context, self.filepath, self.file_format, self.trusted_source)
 
 
 # --------------------------------------------------------------------------------
@@ -1955,8 +1889,6 @@ def read_skin(operator, context, filepath, armature_ob):
             if (bpy.context.mode != 'OBJECT'):
                 bpy.ops.object.mode_set(mode='OBJECT')
 
-            SIGNATURE_SIZE = 28
-            CHUNK_SIZE = 48
             INIT_INFO = 8
             VERT_SIZE = 20
             BONE_SIZE = 112
@@ -1964,68 +1896,51 @@ def read_skin(operator, context, filepath, armature_ob):
             print("Importing mesh: %s" % filepath)
 
             progress.enter_substeps(1, "Read file")
-            data = None
-            with open(filepath, "rb") as a_file:
-                data = a_file.read()
-            progress.leave_substeps("Read file end")
-
-            (signature, chunkCount, totalSize) = \
-                struct.unpack('20sII', data[0:SIGNATURE_SIZE])
-            signature = decodeText(signature)
-            print('Signature:', signature)
-            if signature != 'HD_CHUNK':
-                print("Unrecognized signature: %s" % signature)
-                operator.report({'ERROR'}, "Unrecognized file format")
-                return {'FINISHED'}
-
-            offset = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount)
-            (vertCount, boneCount) = \
-                struct.unpack('II', data[offset:offset + INIT_INFO])
-
-            vert_data = []
-            headerSize = SIGNATURE_SIZE + (CHUNK_SIZE * chunkCount) + INIT_INFO
-            delta = headerSize
-            for n in range(vertCount):
-                offset = delta + (VERT_SIZE * n)
-                (w1, w2, w3, w4, b1, b2, b3, b4) = \
-                    struct.unpack('4f4B', data[offset:offset + VERT_SIZE])
-
-                weights = ((b1, w1), (b2, w2), (b3, w3), (b4, w4))
-                vert_data.append(weights)
-
             bone_data = []
+            with HdChunkFile(filepath) as chunk:
+                print('Signature:', chunk.signature)
+                if chunk.signature != Signature.HD_CHUNK:
+                    print("Unrecognized signature: [%s]" % binascii.hexlify(chunk.view[0:16]))
+                    operator.report({'ERROR'}, "Unrecognized file format")
+                    return {'FINISHED'}
 
-            delta = headerSize + (VERT_SIZE * vertCount)
-            for n in range(boneCount):
-                offset = delta + (BONE_SIZE * n)
-                (name,
-                    f1, f2, f3, f4,
-                    f5, f6, f7, f8,
-                    f9, f10, f11, f12,
-                    f13, f14, f15, f16,
-                    vx, vy, vz, vw) = \
-                    struct.unpack('32s16f4f', data[offset:offset + BONE_SIZE])
-
-                name = decodeText(name)
-                name = boneRenameBlender(name)
-                mat = Matrix(((f1, f2, f3, f4),
-                              (f5, f6, f7, f8),
-                              (f9, f10, f11, f12),
-                              (f13, f14, f15, f16)))
-                vec = Vector((vx, vy, vz, vw))
-                bone_data.append({'name': name, 'mat': mat, 'vec': vec})
+                data = chunk.data
+                (vertCount, boneCount) = struct.unpack_from('II', data)
+
+                # 4 weights and 4 bone indices per vertex
+                skin_dtype = np.dtype([('weights', '<f4', 4), ('bones', 'u1', 4)])
+                vert_data = np.frombuffer(data, dtype=skin_dtype, count=vertCount, offset=INIT_INFO)
+                skin_bones = vert_data['bones'].astype(np.int64)
+                skin_weights = vert_data['weights'].copy()
+                del vert_data
+
+                delta = INIT_INFO + (VERT_SIZE * vertCount)
+                unpack_bone = struct.Struct('32s16f4f').unpack_from
+                for n in range(boneCount):
+                    (name,
+                        f1, f2, f3, f4,
+                        f5, f6, f7, f8,
+                        f9, f10, f11, f12,
+                        f13, f14, f15, f16,
+                        vx, vy, vz, vw) = unpack_bone(data, delta + (BONE_SIZE * n))
+
+                    name = decodeText(name)
+                    name = boneRenameBlender(name)
+                    mat = Matrix(((f1, f2, f3, f4),
+                                  (f5, f6, f7, f8),
+                                  (f9, f10, f11, f12),
+                                  (f13, f14, f15, f16)))
+                    vec = Vector((vx, vy, vz, vw))
+                    bone_data.append({'name': name, 'mat': mat, 'vec': vec})
+                del data
+            progress.leave_substeps("Read file end")
 
             mesh_obj = bpy.context.view_layer.objects.active
 
-            for vertIdx, v_data in enumerate(vert_data):
-                for boneIdx, vertexWeight in v_data:
-
-                    if (boneIdx != 0 or vertexWeight != 0):
-                        boneName = bone_data[boneIdx]['name']
-                        vertGroup = mesh_obj.vertex_groups.get(boneName)
-                        if not vertGroup:
-                            vertGroup = mesh_obj.vertex_groups.new(name=boneName)
-                        vertGroup.add([vertIdx], vertexWeight, 'REPLACE')
+            used = (skin_bones != 0) | (skin_weights != 0)
+            skin_verts = np.repeat(np.arange(vertCount), 4).reshape(-1, 4)
+            add_vertex_weights(mesh_obj, [b_data['name'] for b_data in bone_data],
+                               skin_verts[used], skin_bones[used], skin_weights[used])
 
             if not armature_ob:
                 armature_ob = None
@@ -2105,59 +2020,41 @@ def read_material(operator, context, filepath):
         MASK = 1
         HAIR = 2
 
-    with open(filepath, "rb") as a_file:
-        data = a_file.read()
-    mview = memoryview(data)
-
-    with ProgressReport(context.window_manager) as progReport:
+    with HdChunkFile(filepath) as chunk, ProgressReport(context.window_manager) as progReport:
         with ProgressReportSubstep(progReport, 4, "Importing outfit", "Finish Importing outfit") as progress:
 
             propMap = None
-            sig = sig_check(mview)
+            sig = chunk.signature
 
             if (sig == Signature.HD_CHUNK):
                 print("Signature: %s" % sig.name)
 
-                unpack_int = struct.Struct('<I').unpack
-                unpack_float = struct.Struct('<f').unpack
-                unpack_entry = struct.Struct('<32siiii').unpack
-                (entries, serialSize, assType) = struct.unpack('<ii8s', mview[20:36])
-
-                if (assType.decode('latin') != 'material'):
-                    print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(mview[0:16]), assType))
+                if (chunk.asset_type != 'material'):
+                    print("Unrecognized signature or asset type: [%s], %s" % (binascii.hexlify(chunk.view[0:16]), chunk.asset_type))
                     operator.report({'ERROR'}, "Unrecognized file format")
                     return {'FINISHED'}
 
-                propMap = dict(type={       'reader': lambda x: unpack_int(x)[0]},
-                               twoSided={   'reader': lambda x: unpack_int(x)[0]},
-                               width={      'reader': lambda x: unpack_float(x)[0]},
-                               height={     'reader': lambda x: unpack_float(x)[0]},
-                               autouv={     'reader': lambda x: unpack_int(x)[0]},
-                               diffuseMap={ 'reader': lambda x: readStrW(0, x)[0]},
-                               normalMap={  'reader': lambda x: readStrW(0, x)[0]},
-                               specularMap={'reader': lambda x: readStrW(0, x)[0]},
-                               emissionMap={'reader': lambda x: readStrW(0, x)[0]},
-                               censorMap={  'reader': lambda x: readStrW(0, x)[0]},
-                               maskMap={    'reader': lambda x: readStrW(0, x)[0]},
-                               surface={    'reader': lambda x: readStrA_term(0, 64, x)[0]},
-                               speculars={  'reader': lambda x: struct.unpack('<3f', x)})
-                dataOffset = 28 + (entries * 48)
-
-                for x in range(1, entries):
-                    sPos = 28 + (x * 48)
-                    (name, size, offset, numSubs, subs) = unpack_entry(mview[sPos:sPos+48])
-                    name = readStrA_term(0, 32, name)[0]
-                    propMap[name].update(dict(zip(['size', 'offset', 'numSubs', 'subs', 'hasValue'],[size, offset, numSubs, subs, size > 0])))
-
-                for value in propMap.values():
-                    if (value.get("hasValue")):
-                        (f, lSize, lOff) = (value['reader'], value['size'], value['offset'])
-                        lOff = dataOffset + lOff
-                        value["value"] = f(mview[lOff:lOff+lSize])
+                propMap = dict(type={       'reader': chunk.read_int},
+                               twoSided={   'reader': chunk.read_int},
+                               width={      'reader': chunk.read_float},
+                               height={     'reader': chunk.read_float},
+                               autouv={     'reader': chunk.read_int},
+                               diffuseMap={ 'reader': chunk.read_wstr},
+                               normalMap={  'reader': chunk.read_wstr},
+                               specularMap={'reader': chunk.read_wstr},
+                               emissionMap={'reader': chunk.read_wstr},
+                               censorMap={  'reader': chunk.read_wstr},
+                               maskMap={    'reader': chunk.read_wstr},
+                               surface={    'reader': chunk.read_str},
+                               speculars={  'reader': lambda x: chunk.read_struct(x, '<3f')})
+
+                for name, value in propMap.items():
+                    if name in chunk:
+                        value["value"] = value['reader'](name)
 
             elif (sig == Signature.HD_DATA_TXT or sig == Signature.HD_DATA_TXT_BOM):
                 encoding = "utf-8-sig" if (sig == Signature.HD_DATA_TXT) else "utf-16-le"
-                mview = io.TextIOWrapper(BytesIO(data), encoding=encoding)
+                mview = io.TextIOWrapper(BytesIO(chunk.view), encoding=encoding)
                 print("Signature: %s" % sig.name)
 
                 propMap = dict( type={'reader':          lambda s: MatType[s]},
@@ -2188,7 +2085,7 @@ def read_material(operator, context, filepath):
                     value = line[line.index(' ')+1:]
                     propMap[key]["value"] = propMap[key]["reader"](value)
             else:
-                print("Unrecognized signature or asset type: %s" % (binascii.hexlify(mview[0:16])))
+                print("Unrecognized signature or asset type: %s" % (binascii.hexlify(chunk.view[0:16])))
                 operator.report({'ERROR'}, "Unrecognized file format")
                 return {'FINISHED'}
 
@@ -0,0 +1,72 @@
+# <pep8 compliant>
+
+import numpy as np
+
+# .mesh vertex layout (60 bytes)
+MESH_VERT_DTYPE = np.dtype([('pos', '<f4', 3),
+                            ('uv', '<f4', 2),
+                            ('color', 'u1', 4),
+                            ('normal', '<f4', 3),
+                            ('tangent', '<f4', 3),
+                            ('bitangent', '<f4', 3)])
+
+
+def to_haydee(vecs):
+    """(N, 3) Blender vectors (x, y, z) to Haydee (-x, z, -y)."""
+    return np.asarray(vecs)[:, (0, 2, 1)] * np.array((-1, 1, -1), dtype=np.float32)
+
+
+def _normalize(vecs):
+    length = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return np.divide(vecs, length, out=np.zeros_like(vecs), where=length > 0)
+
+
+def split_vertices(loop_verts, loop_uvs, loop_normals):
+    """Unique (vertex, uv, normal) combinations of the corners.
+
+    Returns the first corner of every unique vertex, in corner order,
+    and the unique vertex of every corner.
+    """
+    # -0.0 and 0.0 compare as different bytes
+    keys = np.column_stack((loop_verts, loop_uvs, loop_normals)).astype(np.float64) + 0.0
+    keys = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.itemsize * keys.shape[1]))).ravel()
+    (_, first, inverse) = np.unique(keys, return_index=True, return_inverse=True)
+    # keep the order the corners come in
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return (first[order], rank[inverse.reshape(-1)])
+
+
+def vertex_tangents(positions, uvs, normals, tris):
+    """Per vertex tangents and bitangents from the UV layout.
+
+    Triangle tangents are summed on their vertices, then made orthogonal
+    to the normal. The bitangent follows the normal and tangent, flipped
+    where the UVs are mirrored.
+    """
+    (p0, p1, p2) = (positions[tris[:, n]] for n in range(3))
+    (t0, t1, t2) = (uvs[tris[:, n]] for n in range(3))
+    (e1, e2) = (p1 - p0, p2 - p0)
+    (d1, d2) = (t1 - t0, t2 - t0)
+    r = d1[:, 0] * d2[:, 1] - d2[:, 0] * d1[:, 1]
+    r = np.where(np.abs(r) > 1e-12, r, 1)[:, None]
+    faceTangents = (e1 * d2[:, 1:] - e2 * d1[:, 1:]) / r
+    faceBitangents = (e2 * d1[:, :1] - e1 * d2[:, :1]) / r
+
+    tangents = np.zeros((len(positions), 3))
+    bitangents = np.zeros((len(positions), 3))
+    for n in range(3):
+        np.add.at(tangents, tris[:, n], faceTangents)
+        np.add.at(bitangents, tris[:, n], faceBitangents)
+
+    normals = _normalize(np.asarray(normals, dtype=np.float64))
+    tangents = _normalize(tangents - np.sum(tangents * normals, axis=1, keepdims=True) * normals)
+    # any direction around the normal where the UVs give none
+    missing = ~np.any(tangents, axis=1)
+    if np.any(missing):
+        helper = np.where(np.abs(normals[missing, :1]) < 0.9, (1.0, 0, 0), (0, 1.0, 0))
+        tangents[missing] = _normalize(np.cross(normals[missing], helper))
+    cross = np.cross(normals, tangents)
+    sign = np.where(np.sum(cross * bitangents, axis=1) < 0, -1.0, 1.0)[:, None]
+    return (tangents, cross * sign)
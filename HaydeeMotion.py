@@ -0,0 +1,352 @@
+# <pep8 compliant>
+
+import numpy as np
+
+from .HaydeeSkeleton import quaternion_matrices, bone_depths
+
+# 90 degrees around Z
+ROTATE_Z = np.array(((0, -1, 0, 0),
+                     (1, 0, 0, 0),
+                     (0, 0, 1, 0),
+                     (0, 0, 0, 1)), dtype=np.float64)
+
+
+def key_matrices(keys):
+    """(..., 7) motion keys to (..., 4, 4) Blender matrices.
+
+    Keys are stored as (x, y, z, qx, qz, qy, qw), relative to the
+    parent bone.
+    """
+    keys = np.asarray(keys, dtype=np.float64)
+    shape = keys.shape[:-1]
+    quats = keys[..., (6, 5, 3, 4)].reshape(-1, 4) * (1, -1, 1, 1)
+    mats = np.zeros(shape + (4, 4))
+    mats[..., :3, :3] = quaternion_matrices(quats).reshape(shape + (3, 3))
+    mats[..., :3, 3] = keys[..., (2, 0, 1)] * (-1, 1, 1)
+    mats[..., 3, 3] = 1
+    return mats
+
+
+def matrix_keys(mats):
+    """Inverse of key_matrices, (..., 4, 4) matrices to (..., 7) motion keys."""
+    mats = np.asarray(mats, dtype=np.float64)
+    shape = mats.shape[:-2]
+    quats = rotation_quaternions(mats.reshape(-1, 4, 4)).reshape(shape + (4,))
+    t = mats[..., :3, 3]
+    return np.stack((t[..., 1], t[..., 2], -t[..., 0],
+                     quats[..., 2], quats[..., 3], -quats[..., 1], quats[..., 0]), axis=-1)
+
+
+def motion_root_matrices(keys):
+    """Armature space matrices of root bones in .motion files."""
+    return ROTATE_Z @ key_matrices(keys)
+
+
+def dmot_root_matrices(keys):
+    """Armature space matrices of root bones in .dmot files."""
+    keys = np.asarray(keys, dtype=np.float64)
+    mats = key_matrices(keys)
+    mats[..., :3, 3] = keys[..., (0, 2, 1)] * (-1, -1, 1)
+    return mats @ ROTATE_Z
+
+
+def rotation_quaternions(mats):
+    """Rotation part of (N, 3, 3) matrices as (N, 4) unit quaternions (w, x, y, z).
+
+    Axes are normalized first so scale is ignored, w is kept positive.
+    """
+    m = np.array(mats, dtype=np.float64)[:, :3, :3]
+    m /= np.linalg.norm(m, axis=1, keepdims=True)
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    quats = np.empty((len(m), 4))
+    # pick the numerically stable formula per matrix
+    case = np.argmax(np.stack((trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis=1), axis=1)
+    for c in range(4):
+        sel = case == c
+        if not np.any(sel):
+            continue
+        r = m[sel]
+        if c == 0:
+            s = np.sqrt(np.maximum(trace[sel] + 1, 1e-12)) * 2
+            q = (s / 4, (r[:, 2, 1] - r[:, 1, 2]) / s, (r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 1, 0] - r[:, 0, 1]) / s)
+        elif c == 1:
+            s = np.sqrt(np.maximum(1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2], 1e-12)) * 2
+            q = ((r[:, 2, 1] - r[:, 1, 2]) / s, s / 4, (r[:, 0, 1] + r[:, 1, 0]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s)
+        elif c == 2:
+            s = np.sqrt(np.maximum(1 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2], 1e-12)) * 2
+            q = ((r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 0, 1] + r[:, 1, 0]) / s, s / 4, (r[:, 1, 2] + r[:, 2, 1]) / s)
+        else:
+            s = np.sqrt(np.maximum(1 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1], 1e-12)) * 2
+            q = ((r[:, 1, 0] - r[:, 0, 1]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s, (r[:, 1, 2] + r[:, 2, 1]) / s, s / 4)
+        quats[sel] = np.stack(q, axis=1)
+    quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+    quats[quats[:, 0] < 0] *= -1
+    return quats
+
+
+def continuous_quaternions(quats):
+    """Flip signs of (..., frames, 4) quaternions so each frame stays
+    on the side of the previous one and interpolation takes the short way.
+    """
+    quats = np.array(quats, dtype=np.float64)
+    if quats.shape[-2] < 2:
+        return quats
+    dots = np.sum(quats[..., 1:, :] * quats[..., :-1, :], axis=-1)
+    flips = np.cumprod(np.where(dots < 0, -1.0, 1.0), axis=-1)
+    quats[..., 1:, :] *= flips[..., None]
+    return quats
+
+
+def pose_channels(targets, rest, parentRest):
+    """Location and rotation channels that put bones at the target matrices.
+
+    targets are (bones, frames, 4, 4) pose matrices in the space of the
+    parent bone (armature space for roots), rest and parentRest are the
+    (bones, 4, 4) rest matrices of each bone and its parent (identity
+    for roots). Returns (bones, frames, 3) locations and
+    (bones, frames, 4) quaternions.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    toBone = np.linalg.inv(np.asarray(rest, dtype=np.float64)) @ np.asarray(parentRest, dtype=np.float64)
+    basis = toBone[:, None] @ targets
+    (boneCount, frameCount) = targets.shape[:2]
+    locs = basis[..., :3, 3]
+    quats = rotation_quaternions(basis.reshape(-1, 4, 4)).reshape(boneCount, frameCount, 4)
+    return (locs, continuous_quaternions(quats))
+
+
+def quaternion_products(a, b):
+    """Hamilton products of (..., 4) quaternions (w, x, y, z)."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    w1, v1 = a[..., :1], a[..., 1:]
+    w2, v2 = b[..., :1], b[..., 1:]
+    return np.concatenate((w1 * w2 - np.sum(v1 * v2, axis=-1, keepdims=True),
+                           w1 * v2 + w2 * v1 + np.cross(v1, v2)), axis=-1)
+
+
+def euler_matrices(eulers, order='XYZ'):
+    """(..., 3) euler angles to (..., 3, 3) matrices, in Blender's rotation order."""
+    eulers = np.asarray(eulers, dtype=np.float64)
+    mats = np.broadcast_to(np.eye(3), eulers.shape[:-1] + (3, 3))
+    for axis in order:
+        idx = 'XYZ'.index(axis)
+        (a, b) = [n for n in range(3) if n != idx]
+        cos = np.cos(eulers[..., idx])
+        sin = np.sin(eulers[..., idx])
+        rot = np.zeros(eulers.shape[:-1] + (3, 3))
+        rot[..., idx, idx] = 1
+        rot[..., a, a] = cos
+        rot[..., b, b] = cos
+        # Y turns the other way around as its axes are (X, Z)
+        rot[..., b, a] = sin if idx != 1 else -sin
+        rot[..., a, b] = -sin if idx != 1 else sin
+        # first axis of the order is applied first
+        mats = rot @ mats
+    return mats
+
+
+def axis_angle_quaternions(axisAngles):
+    """(..., 4) axis angles (angle, x, y, z) to (..., 4) quaternions."""
+    axisAngles = np.asarray(axisAngles, dtype=np.float64)
+    axes = axisAngles[..., 1:]
+    length = np.linalg.norm(axes, axis=-1, keepdims=True)
+    axes = np.divide(axes, length, out=np.zeros_like(axes), where=length > 0)
+    half = axisAngles[..., :1] / 2
+    quats = np.concatenate((np.cos(half), np.sin(half) * axes), axis=-1)
+    quats[length[..., 0] == 0] = (1, 0, 0, 0)
+    return quats
+
+
+def quaternion_matrices(quats):
+    """(..., 4) unit quaternions (w, x, y, z) to (..., 3, 3) rotation matrices."""
+    quats = np.asarray(quats, dtype=np.float64)
+    (w, x, y, z) = (quats[..., n] for n in range(4))
+    return np.stack((np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+                     np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+                     np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1)), axis=-2)
+
+
+def matrix_eulers(mats, order='XYZ'):
+    """(..., frames, 3, 3) rotation matrices to (..., frames, 3) euler angles.
+
+    Inverse of euler_matrices. Angles are unwrapped along the frames so
+    they don't jump by whole turns between keys.
+    """
+    m = np.asarray(mats, dtype=np.float64)
+    (i, j, k) = ('XYZ'.index(axis) for axis in order)
+    # odd orders turn the other way around the middle axis
+    sign = 1 if (j - i) % 3 == 1 else -1
+    eulers = np.empty(m.shape[:-2] + (3,))
+    cos = np.hypot(m[..., i, i], m[..., j, i])
+    eulers[..., j] = np.arctan2(-sign * m[..., k, i], cos)
+    eulers[..., i] = np.arctan2(sign * m[..., k, j], m[..., k, k])
+    eulers[..., k] = np.arctan2(sign * m[..., j, i], m[..., i, i])
+    # gimbal lock, the last axis is left at 0
+    lock = cos < 1e-6
+    eulers[..., i] = np.where(lock, np.arctan2(-sign * m[..., j, k], m[..., j, j]), eulers[..., i])
+    eulers[..., k] = np.where(lock, 0, eulers[..., k])
+    return np.unwrap(eulers, axis=-2)
+
+
+def quaternion_axis_angles(quats):
+    """(..., frames, 4) quaternions to (..., frames, 4) axis angles (angle, x, y, z).
+
+    Frames without rotation keep the axis of the frame before them,
+    the Y axis when there is none.
+    """
+    quats = np.asarray(quats, dtype=np.float64)
+    length = np.linalg.norm(quats[..., 1:], axis=-1)
+    axisAngles = np.empty(quats.shape)
+    axisAngles[..., 0] = 2 * np.arctan2(length, quats[..., 0])
+    axisAngles[..., 1:] = np.divide(quats[..., 1:], length[..., None],
+                                    out=np.zeros(quats[..., 1:].shape), where=length[..., None] > 1e-12)
+    valid = length > 1e-12
+    frames = np.arange(quats.shape[-2])
+    previous = np.maximum.accumulate(np.where(valid, frames, -1), axis=-1)
+    axes = np.take_along_axis(axisAngles[..., 1:], np.maximum(previous, 0)[..., None], axis=-2)
+    axes[previous < 0] = (0, 1, 0)
+    axisAngles[..., 1:] = axes
+    return axisAngles
+
+
+def basis_matrices(locs, rots, scales):
+    """Pose bone channels to (..., 4, 4) basis matrices.
+
+    rots are (..., 4) quaternions or (..., 3, 3) rotation matrices.
+    """
+    rots = np.asarray(rots, dtype=np.float64)
+    if rots.shape[-1] == 4:
+        shape = rots.shape[:-1]
+        quats = rots.reshape(-1, 4)
+        length = np.linalg.norm(quats, axis=1, keepdims=True)
+        quats = np.divide(quats, length, out=np.tile((1.0, 0, 0, 0), (len(quats), 1)), where=length > 0)
+        rots = quaternion_matrices(quats).reshape(shape + (3, 3))
+    mats = np.zeros(rots.shape[:-2] + (4, 4))
+    mats[..., :3, :3] = rots * np.asarray(scales, dtype=np.float64)[..., None, :]
+    mats[..., :3, 3] = locs
+    mats[..., 3, 3] = 1
+    return mats
+
+
+def armature_matrices(parents, rest, basis):
+    """Forward kinematics of a pose over all frames.
+
+    rest holds the (bones, 4, 4) armature space rest matrices, basis the
+    (bones, frames, 4, 4) basis matrices of the pose bones. Returns the
+    armature space pose matrices, bones of the same depth in one batch.
+    """
+    parents = np.asarray(parents, dtype=np.int64)
+    rest = np.asarray(rest, dtype=np.float64)
+    basis = np.asarray(basis, dtype=np.float64)
+    world = rest[:, None] @ basis
+    depths = bone_depths(parents)
+    for depth in range(1, int(depths.max(initial=0)) + 1):
+        idx = np.flatnonzero(depths == depth)
+        toParent = np.linalg.inv(rest[parents[idx]]) @ rest[idx]
+        world[idx] = world[parents[idx]] @ toParent[:, None] @ basis[idx]
+    return world
+
+
+def dmot_keys(poseMats, parents):
+    """(bones, frames, 7) .dmot keys of armature space pose matrices.
+
+    Root bones are keyed in armature space, other bones relative to
+    their parent.
+    """
+    poseMats = np.asarray(poseMats, dtype=np.float64)
+    (boneCount, frameCount) = poseMats.shape[:2]
+    parents = np.asarray(parents, dtype=np.int64)
+    keys = np.empty((boneCount, frameCount, 7))
+
+    roots = np.flatnonzero(parents < 0)
+    mats = poseMats[roots].reshape(-1, 4, 4)
+    # rotated -90 degrees around Z
+    quats = -quaternion_products(rotation_quaternions(mats), (np.sqrt(0.5), 0, 0, np.sqrt(0.5)))
+    heads = mats[:, :3, 3]
+    keys[roots] = np.stack((-heads[:, 0], heads[:, 2], -heads[:, 1],
+                            quats[:, 1], quats[:, 0], quats[:, 2], quats[:, 3]), axis=1).reshape(len(roots), frameCount, 7)
+
+    children = np.flatnonzero(parents >= 0)
+    mats = poseMats[children].reshape(-1, 4, 4)
+    parentMats = poseMats[parents[children]].reshape(-1, 4, 4)
+    parentInv = np.linalg.inv(parentMats)
+    # offset from the parent head in parent space, without its scale
+    parentRot = quaternion_matrices(rotation_quaternions(parentInv))
+    heads = (parentRot @ (mats[:, :3, 3] - parentMats[:, :3, 3])[..., None])[..., 0]
+    quats = rotation_quaternions(parentInv[:, :3, :3] @ mats[:, :3, :3])
+    keys[children] = np.stack((heads[:, 1], heads[:, 2], -heads[:, 0],
+                               -quats[:, 2], -quats[:, 3], quats[:, 1], -quats[:, 0]), axis=1).reshape(len(children), frameCount, 7)
+    return keys
+
+
+def motion_keys(poseMats, parents):
+    """(bones, frames, 7) .motion keys of armature space pose matrices.
+
+    Same as dmot_keys except for root bones, which .motion files store
+    rotated 90 degrees around Z.
+    """
+    keys = dmot_keys(poseMats, parents)
+    roots = np.flatnonzero(np.asarray(parents) < 0)
+    keys[roots] = matrix_keys(ROTATE_Z.T @ np.asarray(poseMats, dtype=np.float64)[roots])
+    return keys
+
+
+def frame_selection(numFrames, frameStart=1, frameEnd=0, frameStep=1):
+    """1 based numbers of the frames to import.
+
+    frameEnd 0 (or past the end) imports up to the last frame.
+    """
+    if frameEnd <= 0 or frameEnd > numFrames:
+        frameEnd = numFrames
+    return np.arange(max(frameStart, 1), frameEnd + 1, max(frameStep, 1))
+
+
+def bone_selection(boneList):
+    """Bone names of a comma separated list, None (all bones) when empty."""
+    names = {name.strip() for name in boneList.split(',') if name.strip()}
+    return names or None
+
+
+def reduce_keys(values, tolerance):
+    """Keys of (frames, channels) samples needed to stay within tolerance.
+
+    Returns a (frames, channels) mask of keys to keep so that linear
+    interpolation between kept keys is within tolerance (per channel) of
+    every sample. Every pass tries to drop every other kept key of all
+    channels at once and restores the ones that break the tolerance.
+    """
+    (frameCount, channelCount) = values.shape
+    keep = np.ones((channelCount, frameCount), dtype=bool)
+    if frameCount < 3:
+        return keep.T
+    # channels one after the other, first and last keys are always kept
+    y = np.asarray(values, dtype=np.float64).T.reshape(-1)
+    x = np.arange(len(y))
+    tol = np.repeat(np.broadcast_to(np.asarray(tolerance, dtype=np.float64), (channelCount,)), frameCount)
+    ends = np.zeros((channelCount, frameCount), dtype=bool)
+    ends[:, (0, -1)] = True
+    ends = ends.reshape(-1)
+    keep = keep.reshape(-1)
+
+    idle = 0
+    parity = 1
+    while idle < 2:
+        kept = np.flatnonzero(keep)
+        candidates = kept[parity::2]
+        candidates = candidates[~ends[candidates]]
+        parity = 1 - parity
+        if not len(candidates):
+            idle += 1
+            continue
+        trial = keep.copy()
+        trial[candidates] = False
+        trialKept = x[trial]
+        over = np.abs(np.interp(x, trialKept, y[trial]) - y) > tol
+        # a segment runs from a kept key up to the next one
+        segmentOver = np.logical_or.reduceat(over, trialKept)
+        segment = np.cumsum(trial) - 1
+        removed = candidates[~segmentOver[segment[candidates]]]
+        keep[removed] = False
+        idle = 0 if len(removed) else idle + 1
+    return keep.reshape(channelCount, frameCount).T
@@ -102,7 +102,10 @@ class HaydeeToolsExportPanel(_HaydeeToolsPanel, bpy.types.Panel):
         col.label(text='Mesh:')
         # c = col.column()
         r = col.row(align=True)
-        r.operator("haydee_exporter.dmesh", text='DMesh', icon='NONE')
+        r1c1 = r.column(align=True)
+        r1c1.operator("haydee_exporter.dmesh", text='DMesh', icon='NONE')
+        r1c2 = r.column(align=True)
+        r1c2.operator('haydee_exporter.mesh', text='Mesh')
 
         # col.separator()
         col = layout.column()
@@ -126,8 +129,11 @@ class HaydeeToolsExportPanel(_HaydeeToolsPanel, bpy.types.Panel):
         col = layout.column()
 
         col.label(text='Motion:')
-        c = col.column(align=True)
-        c.operator('haydee_exporter.dmot', text='DMot')
+        r = col.row(align=True)
+        r1c1 = r.column(align=True)
+        r1c1.operator('haydee_exporter.dmot', text='DMot')
+        r1c2 = r.column(align=True)
+        r1c2.operator('haydee_exporter.motion', text='Motion')
 
 
 class HaydeeToolsSkelPanel(_HaydeeToolsPanel, bpy.types.Panel):
@@ -0,0 +1,172 @@
+# <pep8 compliant>
+
+import numpy as np
+
+
+def parent_indices(names, parents):
+    """Parent index of every bone, -1 for root bones.
+
+    parents holds an index (-1 for none) or a bone name (None for none)
+    per bone. Names are resolved through a dict built once, unknown
+    parents make the bone a root.
+    """
+    nameIndex = {name: idx for idx, name in enumerate(names)}
+    result = []
+    for idx, parent in enumerate(parents):
+        if isinstance(parent, str):
+            parent = nameIndex.get(parent, -1)
+        elif parent is None or parent >= len(names):
+            parent = -1
+        result.append(-1 if parent == idx else parent)
+    return result
+
+
+def hierarchy_order(parents):
+    """Bone indices with every parent before its children.
+
+    Breadth first walk from the root bones, iterative so deep chains do
+    not hit the recursion limit. Bones in a parent cycle are left out.
+    """
+    children = [[] for _ in parents]
+    order = []
+    for idx, parent in enumerate(parents):
+        if parent < 0:
+            order.append(idx)
+        else:
+            children[parent].append(idx)
+    # order grows while it is walked
+    for idx in order:
+        order.extend(children[idx])
+    return order
+
+
+def bone_depths(parents):
+    """Hierarchy depth of every bone (0 for roots, -1 for bones in a cycle)."""
+    depths = np.full(len(parents), -1, dtype=np.int64)
+    for idx in hierarchy_order(parents):
+        parent = parents[idx]
+        depths[idx] = 0 if parent < 0 else depths[parent] + 1
+    return depths
+
+
+def quaternion_matrices(quats):
+    """(N, 4) quaternions (w, x, y, z) to (N, 3, 3) rotation matrices."""
+    w, x, y, z = np.asarray(quats, dtype=np.float64).reshape(-1, 4).T
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+        np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+        np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1),
+    ), axis=1)
+
+
+def _normalize(vecs):
+    length = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return np.divide(vecs, length, out=np.zeros_like(vecs), where=length > 0)
+
+
+def edit_bone_matrices(mats):
+    """Matrices as an edit bone stores them.
+
+    Scale is dropped and the axes are made orthogonal around the Y axis,
+    the Z axis only decides the roll.
+    """
+    mats = np.array(mats, dtype=np.float64)
+    y = _normalize(mats[:, :3, 1])
+    z = mats[:, :3, 2]
+    z = _normalize(z - np.sum(z * y, axis=1, keepdims=True) * y)
+    mats[:, :3, 0] = np.cross(y, z)
+    mats[:, :3, 1] = y
+    mats[:, :3, 2] = z
+    mats[:, 3] = (0, 0, 0, 1)
+    return mats
+
+
+def world_matrices(parents, local):
+    """Forward kinematics for all bones.
+
+    local holds (N, 4, 4) matrices relative to the parent bone, root
+    bones hold their world matrix. Bones of the same depth are solved
+    in one batch, the parent is taken as the edit bone would store it.
+    """
+    parents = np.asarray(parents, dtype=np.int64)
+    world = np.array(local, dtype=np.float64)
+    depths = bone_depths(parents)
+    for depth in range(1, int(depths.max(initial=0)) + 1):
+        idx = np.flatnonzero(depths == depth)
+        world[idx] = edit_bone_matrices(world[parents[idx]]) @ world[idx]
+    return world
+
+
+def bone_tails(parents, world, lengths):
+    """Tail of every bone, moved onto the head of a child in line with it.
+
+    Children are tested in index order against the current tail, one
+    batch per child rank, like the per bone loop this replaces.
+    """
+    parents = np.asarray(parents, dtype=np.int64)
+    heads = world[:, :3, 3]
+    tails = heads + _normalize(world[:, :3, 1]) * np.asarray(lengths, dtype=np.float64).reshape(-1, 1)
+
+    # rank of every child among the children of its parent
+    children = np.flatnonzero(parents >= 0)
+    children = children[np.argsort(parents[children], kind='stable')]
+    childParents = parents[children]
+    first = np.searchsorted(childParents, childParents)
+    ranks = np.arange(len(children)) - first
+
+    for rank in range(int(ranks.max(initial=-1)) + 1):
+        child = children[ranks == rank]
+        bone = childParents[ranks == rank]
+        proxVec = heads[child] - heads[bone]
+        boneVec = tails[bone] - heads[bone]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            norm = np.sum(proxVec * boneVec, axis=1) / np.sum(boneVec * boneVec, axis=1)
+        dist = np.linalg.norm(proxVec - norm[:, None] * boneVec, axis=1)
+        snap = (norm > 0.1) & (dist < 0.001)
+        tails[bone[snap]] = heads[child[snap]]
+    return tails
+
+
+def _zero_roll_matrices(axes):
+    # Rotation taking the Y axis to each (unit) axis with no roll
+    x, y, z = axes.T
+    theta = 1 + y
+    mats = np.zeros((len(axes), 3, 3))
+    mats[:, :, 1] = axes
+    mats[:, 0, 0] = 1 - x * x / np.where(theta > 0, theta, 1)
+    mats[:, 1, 0] = -x
+    mats[:, 2, 0] = -x * z / np.where(theta > 0, theta, 1)
+    mats[:, 0, 2] = mats[:, 2, 0]
+    mats[:, 1, 2] = -z
+    mats[:, 2, 2] = 1 - z * z / np.where(theta > 0, theta, 1)
+    # pointing down -Y, mirror around Z
+    down = theta <= 1e-6
+    mats[down] = np.diag((-1.0, -1.0, 1.0))
+    return mats
+
+
+def bone_rolls(mats, heads, tails):
+    """Roll of bones running from heads to tails oriented like mats."""
+    base = _zero_roll_matrices(_normalize(tails - heads))
+    z = mats[:, :3, 2]
+    return np.arctan2(np.sum(base[:, :, 0] * z, axis=1), np.sum(base[:, :, 2] * z, axis=1))
+
+
+def roll_matrices(heads, tails, rolls):
+    """Inverse of bone_rolls, (N, 4, 4) bone matrices."""
+    axes = _normalize(tails - heads)
+    base = _zero_roll_matrices(axes)
+    # rotate around the bone axis by roll
+    cos = np.cos(rolls)[:, None, None]
+    sin = np.sin(rolls)[:, None, None]
+    cross = np.zeros_like(base)
+    x, y, z = axes.T
+    cross[:, 0, 1], cross[:, 0, 2], cross[:, 1, 2] = -z, y, -x
+    cross[:, 1, 0], cross[:, 2, 0], cross[:, 2, 1] = z, -y, x
+    outer = axes[:, :, None] * axes[:, None, :]
+    rot = cos * np.eye(3) + sin * cross + (1 - cos) * outer
+    mats = np.zeros((len(heads), 4, 4))
+    mats[:, :3, :3] = rot @ base
+    mats[:, :3, 3] = heads
+    mats[:, 3, 3] = 1
+    return mats
@@ -0,0 +1,107 @@
+# <pep8 compliant>
+
+import codecs
+
+import numpy as np
+
+HD_DATA_TXT_SIGNATURE = 'HD_DATA_TXT'
+
+# Bytes read from disk at a time
+CHUNK_SIZE = 1 << 20
+# Lines of a bulk run handed over at a time
+RUN_SIZE = 1 << 16
+
+
+def read_line_blocks(filepath, encoding="utf-8-sig", errors="strict"):
+    """Yield the lines of a text file in blocks.
+
+    The file is read in large binary chunks and decoded incrementally,
+    so memory use is bounded by CHUNK_SIZE instead of the file size.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    tail = ''
+    with open(filepath, 'rb') as a_file:
+        while True:
+            chunk = a_file.read(CHUNK_SIZE)
+            if not chunk:
+                tail += decoder.decode(b'', final=True)
+                if tail:
+                    yield [tail]
+                return
+            lines = (tail + decoder.decode(chunk)).split('\n')
+            # Last line may continue in the next chunk
+            tail = lines.pop()
+            yield lines
+
+
+def parse_data_txt(filepath, handlers, bulk=None, errors="strict"):
+    """Stream an HD_DATA_TXT file through a keyword table.
+
+    handlers maps the first word of a line to handler(level, rest), where
+    rest is the remainder of the line without the trailing ';'. Nesting
+    level is updated by '{' and '}' before dispatching.
+    bulk maps keywords of homogeneous runs (vert, uv, weight...) to
+    handler(level, rests), called once per run of consecutive lines.
+    Returns the file signature, nothing is dispatched for other formats.
+    """
+    bulk = bulk or {}
+    signature = None
+    level = 0
+    run_keyword = None
+    run = []
+    for lines in read_line_blocks(filepath, errors=errors):
+        for line in lines:
+            line = line.strip().strip(';')
+            if not line:
+                continue
+            line_split = line.split(None, 1)
+            keyword = line_split[0]
+            if signature is None:
+                signature = keyword
+                if signature != HD_DATA_TXT_SIGNATURE:
+                    return signature
+                continue
+            if keyword == run_keyword:
+                run.append(line_split[1] if len(line_split) > 1 else '')
+                if len(run) >= RUN_SIZE:
+                    bulk[run_keyword](level, run)
+                    run = []
+                continue
+            if run_keyword:
+                if run:
+                    bulk[run_keyword](level, run)
+                run_keyword = None
+                run = []
+            if keyword in bulk:
+                run_keyword = keyword
+                run.append(line_split[1] if len(line_split) > 1 else '')
+                continue
+            if keyword == '{':
+                level += 1
+                continue
+            if keyword == '}':
+                level -= 1
+                continue
+            handler = handlers.get(keyword)
+            if handler:
+                handler(level, line_split[1] if len(line_split) > 1 else '')
+    if run:
+        bulk[run_keyword](level, run)
+    return signature
+
+
+def parse_floats(rests, vec_len, dtype=np.float32):
+    """Parse a run of lines with vec_len numbers each into a (n, vec_len) array.
+
+    The run is joined and converted in one call, lines with a different
+    amount of values or text that is not a number fall back to a per
+    line parse.
+    """
+    try:
+        values = np.array(' '.join(rests).split(), dtype=dtype)
+    except ValueError:
+        values = None
+    if values is not None and values.size == len(rests) * vec_len:
+        return values.reshape(-1, vec_len)
+    values = [[float(v) for v in rest.split()[:vec_len]] for rest in rests]
+    return np.array(values, dtype=dtype).reshape(-1, vec_len)
@@ -1,6 +1,7 @@
 # <pep8 compliant>
 
 import bpy
+import numpy as np
 from bpy.props import EnumProperty
 
 NAME_LIMIT = 31
@@ -47,6 +48,56 @@ def d(number):
         return "0"
     return r
 
+
+# Powers of ten for digit extraction
+POW10 = 10 ** np.arange(10, dtype=np.uint32)
+# Values from this magnitude on are formatted by d() one by one
+D_LIMIT = 1e9
+
+
+def d_array(numbers):
+    """d() of every value of an array (flattened) as a list of strings.
+
+    Values are rounded to millionths and their digits laid out as a byte
+    table in NumPy. Values '%.6f' could round the other way (too close to
+    a half millionth), too large or not finite go through d(), so the
+    result is byte identical to calling d() per value.
+    """
+    values = np.asarray(numbers, dtype=np.float64).ravel()
+    with np.errstate(invalid='ignore'):
+        scaled = values * 1e6
+        rounded = np.rint(scaled)
+        exact = (np.abs(values) < D_LIMIT) & (np.abs(np.abs(scaled - rounded) - 0.5) > np.abs(scaled) * 1e-15)
+    rounded[~exact] = 0
+    fixed = np.abs(rounded).astype(np.uint64)
+    integer = (fixed // 1000000).astype(np.uint32)
+    fraction = (fixed % 1000000).astype(np.uint32)
+    width = len(str(int(integer.max(initial=0))))
+
+    # sign, integer digits, point, 6 decimals, separator
+    chars = np.empty((len(values), width + 9), dtype=np.uint8)
+    keep = np.empty(chars.shape, dtype=bool)
+    chars[:, 0] = ord('-')
+    keep[:, 0] = rounded < 0
+    digits = (integer[:, None] // POW10[width - 1::-1]) % 10
+    chars[:, 1:width + 1] = ord('0') + digits
+    # no leading zeros, a single 0 is kept
+    keep[:, 1:width + 1] = np.cumsum(digits, axis=1) > 0
+    keep[:, width] = True
+    chars[:, width + 1] = ord('.')
+    keep[:, width + 1] = fraction > 0
+    digits = (fraction[:, None] // POW10[5::-1]) % 10
+    chars[:, width + 2:width + 8] = ord('0') + digits
+    # no trailing zeros
+    keep[:, width + 2:width + 8] = np.cumsum(digits[:, ::-1], axis=1)[:, ::-1] > 0
+    chars[:, -1] = ord(' ')
+    keep[:, -1] = True
+
+    result = chars[keep].tobytes().decode('ascii').split()
+    for idx in np.flatnonzero(~exact).tolist():
+        result[idx] = d(float(values[idx]))
+    return result
+
 # --------------------------------------------------------------------------------
 #  Finds a suitable armature in the current selection or scene
 # --------------------------------------------------------------------------------
@@ -19,6 +19,11 @@ bl_info = {
 #############################################
 # support reloading sub-modules
 _modules = [
+    'HaydeeChunk',
+    'HaydeeText',
+    'HaydeeSkeleton',
+    'HaydeeMotion',
+    'HaydeeMesh',
     'HaydeeUtils',
     'HaydeeMenuIcon',
     'HaydeePanels',
@@ -102,7 +107,9 @@ classesToRegister = [
     HaydeeExporter.ExportHaydeeDSkel,
     HaydeeExporter.ExportHaydeeDPose,
     HaydeeExporter.ExportHaydeeDMotion,
+    HaydeeExporter.ExportHaydeeMotion,
     HaydeeExporter.ExportHaydeeDMesh,
+    HaydeeExporter.ExportHaydeeMesh,
     HaydeeExporter.HaydeeExportSubMenu,
 
     HaydeeImporter.ImportHaydeeSkel,